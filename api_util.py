@@ -1,9 +1,10 @@
 import requests
-from typing import Dict, Any, Optional
+from typing import Any, Callable, Dict, Optional
 import json
 from urllib.parse import urlencode
 
-def make_api_request(api_key: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[Any, Any]:
+def make_api_request(api_key: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                     log: Callable[[str], None] = print) -> Dict[Any, Any]:
     """
     Makes an API request with the given credentials and parameters.
     
@@ -11,6 +12,7 @@ def make_api_request(api_key: str, endpoint: str, params: Optional[Dict[str, Any
         api_key (str): The API key for authentication.
         endpoint (str): The API endpoint URL.
         params (dict, optional): Query parameters for the request.
+        log (callable, optional): Receives each debug message; defaults to print.
         
     Returns:
         dict: The JSON response from the API.
@@ -21,25 +23,25 @@ def make_api_request(api_key: str, endpoint: str, params: Optional[Dict[str, Any
     }
     
     # Debug info
-    print(f"\nMaking request to: {endpoint}")
-    print(f"With parameters: {params}")
-    print(f"Headers: {headers}")
+    log(f"\nMaking request to: {endpoint}")
+    log(f"With parameters: {params}")
+    log(f"Headers: {headers}")
     
     try:
         response = requests.get(endpoint, headers=headers, params=params)
         
         # Print the actual URL that was requested
-        print(f"Actual request URL: {response.url}")
+        log(f"Actual request URL: {response.url}")
         
         # Print response status
-        print(f"Response status: {response.status_code}")
+        log(f"Response status: {response.status_code}")
         
         # Try to print some of the response text
-        print(f"Response preview: {response.text[:100]}...")
+        log(f"Response preview: {response.text[:100]}...")
         
         response.raise_for_status()  # Raise an exception for HTTP errors
         return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"Error making API request: {e}")
+        log(f"Error making API request: {e}")
         return {"ERROR": str(e)}
 
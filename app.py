@@ -1,10 +1,11 @@
-import json
+import logging
 import os
+import sys
 import getpass # Import getpass
 from datetime import datetime
-from file_handler import FILE_HANDLER
+from file_handler import FILE_HANDLER, load_config
 from file_append_util import Append
-from fetcher import fetch_and_process_api_data
+from fetcher import fetch_and_process_api_data_many
 from music_history import MusicHistoryProcessor
 from netflix_history import NetflixHistoryProcessor
 from netflix_downloader import download_netflix_history
@@ -13,17 +14,25 @@ from fandango_history import FandangoHistoryProcessor  # Import the new Fandango
 from yelp_parser import YelpReviewProcessor  # Import the new YelpReviewProcessor class
 from ticketmaster_parser import TicketmasterProcessor  # Import the new TicketmasterProcessor class
 
-def load_config(config_path: str) -> dict:
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# API-backed sections checked in every date file: (API type, heading, label), in append order
+API_SECTIONS = (
+    ("NEWS", "## News Headlines", "News"),
+    ("WEATHER", "## Weather", "Weather"),
+    ("TOP_MOVIES", "## Top Box Office Movies", "Movies"),
+    ("BILLBOARD", "## Billboard Hot 100", "Billboard"),
+)
 
 def main():
+    # Modules that log (rather than print) report at INFO and above, formatted like print output
+    # and written to stdout so they stay in order with it and follow its redirection
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     # Load config
     config = load_config('config.json')
 
     # --- Directory Handling ---
     # Instantiate File Handler - this also checks/creates the target directory
-    file_handler = FILE_HANDLER()
+    file_handler = FILE_HANDLER.get()
     if not file_handler.target_dir:
         print("Exiting application because target directory is invalid or could not be created.")
         return
@@ -101,63 +110,36 @@ def main():
                     print(f"\nChecking API data for: {file_path}")
                     needs_update = False
 
-                    # Check and fetch News
-                    news_heading = "## News Headlines"
-                    if not file_handler.file_contains_section(file_path, news_heading):
-                        print(f"  Fetching News data for {file_name}...")
-                        news_markdown = fetch_and_process_api_data("NEWS", config)
-                        if news_markdown:
-                            append_util.append_to_file(file_path, news_markdown)
-                            needs_update = True
-                        else:
-                             print(f"  No News data fetched.")
-                    else:
-                        print(f"  News section already exists.")
-
-                    # Check and fetch Weather
-                    weather_heading = "## Weather"
-                    if not file_handler.file_contains_section(file_path, weather_heading):
-                        print(f"  Fetching Weather data for {file_name}...")
-                        weather_markdown = fetch_and_process_api_data("WEATHER", config)
-                        if weather_markdown:
-                            append_util.append_to_file(file_path, weather_markdown)
-                            needs_update = True
-                        else:
-                            print(f"  No Weather data fetched.")
-                    else:
-                        print(f"  Weather section already exists.")
-
-                    # Check and fetch Movies
-                    movies_heading = "## Top Box Office Movies"
-                    if not file_handler.file_contains_section(file_path, movies_heading):
-                        print(f"  Fetching Movies data for {file_name}...")
-                        movies_markdown = fetch_and_process_api_data("TOP_MOVIES", config)
-                        if movies_markdown:
-                            append_util.append_to_file(file_path, movies_markdown)
-                            needs_update = True
+                    # Work out which sections are missing, then fetch them all at once
+                    missing_sections = []
+                    for api_type, heading, label in API_SECTIONS:
+                        if file_handler.file_contains_section(file_path, heading):
+                            print(f"  {label} section already exists.")
                         else:
-                            print(f"  No Movies data fetched.")
-                    else:
-                        print(f"  Movies section already exists.")
+                            print(f"  Fetching {label} data for {file_name}...")
+                            missing_sections.append((api_type, label))
 
-                    # Check and fetch Billboard (only if filename is a valid date)
-                    billboard_heading = "## Billboard Hot 100"
-                    if not file_handler.file_contains_section(file_path, billboard_heading):
-                        # Date already validated above
-                        print(f"  Fetching Billboard data for date {file_date_str}...")
+                    type_configs = {}
+                    if any(api_type == "BILLBOARD" for api_type, _ in missing_sections):
+                        # Billboard is requested for the file's own date (validated above)
                         billboard_config = config.copy()
                         if 'BILLBOARD_PARAMS' not in billboard_config:
                             billboard_config['BILLBOARD_PARAMS'] = {}
                         billboard_config['BILLBOARD_PARAMS']['date'] = file_date_str
                         billboard_config['BILLBOARD_PARAMS']['range'] = '1-10'
-                        billboard_markdown = fetch_and_process_api_data("BILLBOARD", billboard_config)
-                        if billboard_markdown:
-                            append_util.append_to_file(file_path, billboard_markdown)
+                        type_configs["BILLBOARD"] = billboard_config
+
+                    section_markdown = fetch_and_process_api_data_many(
+                        [api_type for api_type, _ in missing_sections], config, type_configs)
+
+                    # Append in the fixed section order regardless of which request finished first
+                    for api_type, label in missing_sections:
+                        markdown = section_markdown.get(api_type)
+                        if markdown:
+                            append_util.append_to_file(file_path, markdown)
                             needs_update = True
                         else:
-                            print(f"  No Billboard data fetched for {file_date_str}.")
-                    else:
-                        print(f"  Billboard section already exists.")
+                            print(f"  No {label} data fetched for {file_date_str}.")
 
                     if needs_update:
                         processed_api_files += 1
@@ -1,8 +1,8 @@
-import json
 import time
 import os
 import getpass
 import re
+import csv
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
@@ -11,12 +11,227 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
 from datetime import datetime
-from bs4 import BeautifulSoup
+from typing import Any, Dict, Optional, Set, Tuple
+import soupsieve as sv
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+from bs4.element import Tag
+from file_handler import load_config
 
-def load_config(config_path='config.json'):
-    """Load configuration from JSON file."""
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# CSS selectors compiled once at import instead of on every select() call
+_PURCHASE_ITEM_SELECTOR = sv.compile('.purchase-item, .list-item')
+_FAV_HEART_SELECTOR = sv.compile('.js-fav-movie-heart')
+_MOVIE_TITLE_SELECTOR = sv.compile('.movie-title, .list-item__title')
+_INFO_SECTION_CLASS = 'list-item__description--additional-movie-info-section'
+_INFO_SECTION_SELECTOR = sv.compile(f'.{_INFO_SECTION_CLASS}')
+_STRONG_SELECTOR = sv.compile('strong')
+_SUB_TEXT_SELECTOR = sv.compile('div.dark__sub__text')
+_THEATER_LINK_SELECTOR = sv.compile('a.dark__link[href*="theater-page"]')
+_ASIDE_SELECTOR = sv.compile('aside')
+
+# Only purchase item subtrees are kept when parsing a page; everything the
+# extractors look at lives inside them
+_PURCHASE_ITEM_STRAINER = SoupStrainer(class_=re.compile(r'(?:^|\s)(?:purchase-item|list-item)(?:\s|$)'))
+
+# Regular expressions used by the date and address fallbacks, compiled once
+_WEEKDAY_RE = re.compile(r'(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)')
+_ITEM_DATE_PATTERNS = (
+    re.compile(r'((?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday), (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) \d{1,2} \d{4} at \d{1,2}:\d{2} (?:AM|PM))'),
+    re.compile(r'(\d{1,2}/\d{1,2}/\d{4})'),
+    re.compile(r'(\d{4}-\d{2}-\d{2})')
+)
+_STREET_ZIP_RE = re.compile(r'\d+.*\d{5}')
+_STREET_SUFFIX_RE = re.compile(r'\d+\s+\w+\s+(?:St|Ave|Rd|Blvd|Lane|Dr|Circle|Hwy|Highway|Pkwy|Parkway)', re.IGNORECASE)
+_CITY_STATE_ZIP_RE = re.compile(r'\w+,\s*[A-Z]{2}\s*\d{5}')
+
+# Elements whose text is checked for an address by the last-resort fallback
+_ADDRESS_CANDIDATE_TAGS = frozenset(('div', 'span', 'p'))
+
+# Script, style and embed blocks never hold purchase data; they are cut from the page
+# source before parsing so the tokenizer doesn't have to walk them
+_NOISE_BLOCK_RE = re.compile(r'<(script|style|noscript|iframe|embed|object|applet)\b[^>]*>.*?</\1\s*>', re.S | re.I)
+
+# lxml's C parser is much faster than html.parser; fall back when it isn't installed
+_HTML_PARSER = 'lxml' if builder_registry.lookup('lxml') else 'html.parser'
+
+def _find_address_text(item: Tag) -> Optional[str]:
+    """
+    Find the first div, span or p under a purchase item, in document order,
+    whose text looks like a street address or a "City, ST 12345" line.
+
+    An element's text contains the text of all its descendants, so once a
+    candidate's text has no address in it its subtree is skipped instead of
+    re-reading the same text for every nested element.
+
+    Args:
+        item (Tag): Purchase item container.
+
+    Returns:
+        Optional[str]: Stripped text of the matching element, or None.
+    """
+    stack = item.find_all(True, recursive=False)
+    stack.reverse()
+    while stack:
+        elem = stack.pop()
+        if elem.name in _ADDRESS_CANDIDATE_TAGS:
+            text = elem.get_text().strip()
+            if _STREET_SUFFIX_RE.search(text) or _CITY_STATE_ZIP_RE.search(text):
+                return text
+            continue
+        children = elem.find_all(True, recursive=False)
+        children.reverse()
+        stack.extend(children)
+    return None
+
+def _extract_purchase_record(item: Tag, page_num: int, item_number: int,
+                             seen_purchases: Optional[Set[Tuple[str, str]]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Extract one purchase record from a purchase list item.
+
+    Kept free of Selenium state so the per-item extraction can be compiled
+    (e.g. with mypyc) or run under PyPy independently of the browser session.
+
+    Args:
+        item (Tag): The purchase item element.
+        page_num (int): Purchase history page the item was found on.
+        item_number (int): 1-based position of the item on its page.
+        seen_purchases (Optional[Set[Tuple[str, str]]]): (movie, purchase time) pairs already
+            extracted; when given, repeats are skipped and new pairs are added.
+
+    Returns:
+        Optional[Dict[str, Any]]: Record with movie, date, theater, address and page keys,
+            or None if the purchase was already seen.
+    """
+    # Extract movie name
+    movie_name = "Unknown"
+    movie_fav = _FAV_HEART_SELECTOR.select_one(item)
+    if movie_fav and movie_fav.get('data-name'):
+        movie_name = movie_fav.get('data-name')
+    else:
+        movie_title = _MOVIE_TITLE_SELECTOR.select_one(item)
+        if movie_title:
+            movie_name = movie_title.text.strip()
+
+    print(f"  Movie #{item_number}: '{movie_name}'")
+
+    # Extract date - USING DIRECT HTML SEARCH
+    date_time = "Unknown"
+
+    # First look for the "Purchase Completed" section
+    purchase_completed_section = None
+    for section in _INFO_SECTION_SELECTOR.select(item):
+        strong_tags = _STRONG_SELECTOR.select(section)
+        for strong in strong_tags:
+            if "Purchase Completed" in strong.text:
+                purchase_completed_section = section
+                break
+        if purchase_completed_section:
+            break
+
+    # Extract date from Purchase Completed section if found
+    if purchase_completed_section:
+        date_elem = _SUB_TEXT_SELECTOR.select_one(purchase_completed_section)
+        if date_elem:
+            date_time = date_elem.text.strip()
+            print(f"  Found date in Purchase Completed section: {date_time}")
+
+    # If date still unknown, try other methods
+    if date_time == "Unknown":
+        # Try all dark__sub__text elements
+        date_elements = _SUB_TEXT_SELECTOR.select(item)
+        for date_elem in date_elements:
+            date_text = date_elem.text.strip()
+            # Check if it looks like a date (contains day of week, month, year, etc.)
+            if _WEEKDAY_RE.search(date_text) and 'at' in date_text and \
+               ('AM' in date_text or 'PM' in date_text):
+                date_time = date_text
+                print(f"  Found date via dark__sub__text: {date_time}")
+                break
+
+    # If date still unknown, use regex pattern matching on the entire item HTML
+    if date_time == "Unknown":
+        item_html = str(item)
+        for pattern in _ITEM_DATE_PATTERNS:
+            match = pattern.search(item_html)
+            if match:
+                date_time = match.group(1)
+                print(f"  Found date via pattern match: {date_time}")
+                break
+
+    # The same purchase can be listed more than once; once the movie and a purchase time
+    # are known, a repeat is dropped before the theater and address lookups
+    if seen_purchases is not None and movie_name != "Unknown" and ':' in date_time:
+        purchase_key = (movie_name, date_time)
+        if purchase_key in seen_purchases:
+            print(f"  Skipping duplicate purchase: '{movie_name}' at {date_time}")
+            return None
+        seen_purchases.add(purchase_key)
+
+    # Extract theater info
+    theater_name = "Unknown"
+    theater_link = _THEATER_LINK_SELECTOR.select_one(item)
+    if theater_link:
+        theater_name = theater_link.text.strip()
+        print(f"  Found theater: {theater_name}")
+
+    # Enhanced address extraction with multiple approaches
+    theater_address = "Unknown"
+
+    # APPROACH 1: Look for aside directly after theater link within same parent
+    if theater_link:
+        theater_section = theater_link.parent
+        if theater_section:
+            # Check for aside as direct sibling
+            aside_elem = _ASIDE_SELECTOR.select_one(theater_section)
+            if aside_elem and aside_elem.text:
+                theater_address = aside_elem.text.strip()
+                print(f"  Found address (approach 1): {theater_address}")
+
+    # APPROACH 2: Try to find an aside in the info section that holds the theater link.
+    # Walk up from the link (stopping at the item) instead of testing every section in
+    # the item; sections are then tried outermost first, i.e. in document order
+    if theater_address == "Unknown" and theater_link:
+        theater_sections = []
+        for parent in theater_link.parents:
+            if parent is item:
+                break
+            if _INFO_SECTION_CLASS in parent.get('class', ()):
+                theater_sections.append(parent)
+        for section in reversed(theater_sections):
+            aside_elem = _ASIDE_SELECTOR.select_one(section)
+            if aside_elem and aside_elem.text:
+                theater_address = aside_elem.text.strip()
+                print(f"  Found address (approach 2): {theater_address}")
+                break
+
+    # APPROACH 3: Look for any aside element in the container 
+    if theater_address == "Unknown":
+        aside_elems = _ASIDE_SELECTOR.select(item)
+        for aside in aside_elems:
+            if aside.text and _STREET_ZIP_RE.search(aside.text):  # Look for text with street number and zip code
+                theater_address = aside.text.strip()
+                print(f"  Found address (approach 3): {theater_address}")
+                break
+
+    # APPROACH 4: Look for any element with address-like content using text analysis
+    if theater_address == "Unknown" and theater_name != "Unknown":
+        # Find elements that might contain addresses by checking for address patterns
+        address_text = _find_address_text(item)
+        if address_text is not None:
+            theater_address = address_text
+            print(f"  Found address (approach 4): {theater_address}")
+
+    return {
+        "movie": movie_name,
+        "date": date_time,
+        "theater": theater_name,
+        "address": theater_address,
+        "page": page_num
+    }
+
+def _record_row(record: Dict[str, Any]) -> list:
+    """Order a purchase record's fields to match the CSV header."""
+    return [record["movie"], record["date"], record["theater"], record["address"], record["page"]]
 
 def download_fandango_history(config, password):
     """
@@ -151,204 +366,107 @@ def download_fandango_history(config, password):
             # Skip directly to URL-based pagination for purchase history
             print("\nDEBUG: Using URL-based pagination to extract purchase history...")
             
-            # Initialize array to store all purchase data
-            all_purchase_data = []
+            # Stream records to a .part file and rename it over the CSV only once every
+            # page is written, so a failed run never truncates the previous export
+            csv_path = os.path.join(download_dir, "FandangoPurchaseHistory.csv")
+            part_path = csv_path + ".part"
+            row_count = 0
+            seen_purchases = set()
             current_page = 1
             max_pages = 20  # Safety limit
-            
-            # Continue fetching pages until no more data is found or reached max pages
-            while current_page <= max_pages:
-                # Construct the URL with page number
-                page_url = f"https://www.fandango.com/accounts/my-purchases?pn={current_page}"
-                print(f"\nDEBUG: Navigating to page {current_page} using URL: {page_url}")
+            page_size = 0  # Items per page, captured from the first page
+
+            try:
+                with open(part_path, "w", encoding="utf-8", newline="") as csv_file:
+                    writer = csv.writer(csv_file, quoting=csv.QUOTE_NONNUMERIC)
+                    writer.writerow(["Movie", "Date", "Theater", "Address", "Page"])
+
+                    # Continue fetching pages until no more data is found or reached max pages
+                    while current_page <= max_pages:
+                        # Construct the URL with page number
+                        page_url = f"https://www.fandango.com/accounts/my-purchases?pn={current_page}"
+                        print(f"\nDEBUG: Navigating to page {current_page} using URL: {page_url}")
                 
-                # Navigate to the page
-                driver.get(page_url)
+                        # Navigate to the page
+                        driver.get(page_url)
                 
-                # Wait for the page to load
-                time.sleep(5)  # Initial wait
-                try:
-                    WebDriverWait(driver, 15).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, ".purchase-history, .js-fav-movie-heart, [data-name]"))
-                    )
-                except:
-                    print(f"DEBUG: Timeout waiting for page {current_page} to load, but continuing anyway")
+                        # Wait for the page to load
+                        time.sleep(5)  # Initial wait
+                        try:
+                            WebDriverWait(driver, 15).until(
+                                EC.presence_of_element_located((By.CSS_SELECTOR, ".purchase-history, .js-fav-movie-heart, [data-name]"))
+                            )
+                        except:
+                            print(f"DEBUG: Timeout waiting for page {current_page} to load, but continuing anyway")
                 
-                # NEW APPROACH: Get complete page HTML and parse with BeautifulSoup
-                print(f"DEBUG: Getting page source for page {current_page}")
-                page_source = driver.page_source
+                        # NEW APPROACH: Get complete page HTML and parse with BeautifulSoup
+                        print(f"DEBUG: Getting page source for page {current_page}")
+                        page_source = driver.page_source
                 
-                # Save HTML to file for debugging (optional)
-                debug_html_path = os.path.join(fandango_dir, f"fandango_page_{current_page}.html")
-                with open(debug_html_path, "w", encoding="utf-8") as f:
-                    f.write(page_source)
-                print(f"DEBUG: Saved HTML source to {debug_html_path}")
+                        # Save HTML to file for debugging (optional)
+                        debug_html_path = os.path.join(fandango_dir, f"fandango_page_{current_page}.html")
+                        with open(debug_html_path, "w", encoding="utf-8") as f:
+                            f.write(page_source)
+                        print(f"DEBUG: Saved HTML source to {debug_html_path}")
                 
-                # Parse with BeautifulSoup
-                soup = BeautifulSoup(page_source, 'html.parser')
+                        # Parse with BeautifulSoup, building nodes only for purchase items
+                        page_source = _NOISE_BLOCK_RE.sub('', page_source)
+                        soup = BeautifulSoup(page_source, _HTML_PARSER, parse_only=_PURCHASE_ITEM_STRAINER)
                 
-                # Find all purchase items
-                purchase_items = soup.select('.purchase-item, .list-item')
-                page_has_data = False
+                        # Find all purchase items
+                        purchase_items = _PURCHASE_ITEM_SELECTOR.select(soup)
+                        page_has_data = False
                 
-                if purchase_items:
-                    page_has_data = True
-                    print(f"Found {len(purchase_items)} purchase items on page {current_page}")
+                        if purchase_items:
+                            page_has_data = True
+                            print(f"Found {len(purchase_items)} purchase items on page {current_page}")
                     
-                    # Process each purchase item
-                    for i, item in enumerate(purchase_items):
-                        # Extract movie name
-                        movie_name = "Unknown"
-                        movie_fav = item.select_one('.js-fav-movie-heart')
-                        if movie_fav and movie_fav.get('data-name'):
-                            movie_name = movie_fav.get('data-name')
-                        else:
-                            movie_title = item.select_one('.movie-title, .list-item__title')
-                            if movie_title:
-                                movie_name = movie_title.text.strip()
-                        
-                        print(f"  Movie #{i+1}: '{movie_name}'")
-                        
-                        # Extract date - USING DIRECT HTML SEARCH
-                        date_time = "Unknown"
-                        
-                        # First look for the "Purchase Completed" section
-                        purchase_completed_section = None
-                        for section in item.select('.list-item__description--additional-movie-info-section'):
-                            strong_tags = section.select('strong')
-                            for strong in strong_tags:
-                                if "Purchase Completed" in strong.text:
-                                    purchase_completed_section = section
-                                    break
-                            if purchase_completed_section:
-                                break
-                        
-                        # Extract date from Purchase Completed section if found
-                        if purchase_completed_section:
-                            date_elem = purchase_completed_section.select_one('div.dark__sub__text')
-                            if date_elem:
-                                date_time = date_elem.text.strip()
-                                print(f"  Found date in Purchase Completed section: {date_time}")
-                        
-                        # If date still unknown, try other methods
-                        if date_time == "Unknown":
-                            # Try all dark__sub__text elements
-                            date_elements = item.select('div.dark__sub__text')
-                            for date_elem in date_elements:
-                                date_text = date_elem.text.strip()
-                                # Check if it looks like a date (contains day of week, month, year, etc.)
-                                if re.search(r'(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', date_text) and \
-                                   re.search(r'at', date_text) and \
-                                   re.search(r'(AM|PM)', date_text):
-                                    date_time = date_text
-                                    print(f"  Found date via dark__sub__text: {date_time}")
-                                    break
-                        
-                        # If date still unknown, use regex pattern matching on the entire item HTML
-                        if date_time == "Unknown":
-                            item_html = str(item)
-                            date_patterns = [
-                                r'((?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday), (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) \d{1,2} \d{4} at \d{1,2}:\d{2} (?:AM|PM))',
-                                r'(\d{1,2}/\d{1,2}/\d{4})',
-                                r'(\d{4}-\d{2}-\d{2})'
+                            # Process each purchase item, handing the rows to the writer in one call
+                            page = current_page
+                            records = [
+                                _extract_purchase_record(item, page, item_number, seen_purchases)
+                                for item_number, item in enumerate(purchase_items, 1)
                             ]
-                            
-                            for pattern in date_patterns:
-                                matches = re.findall(pattern, item_html)
-                                if matches:
-                                    date_time = matches[0]
-                                    print(f"  Found date via pattern match: {date_time}")
-                                    break
-                        
-                        # Extract theater info
-                        theater_name = "Unknown"
-                        theater_link = item.select_one('a.dark__link[href*="theater-page"]')
-                        if theater_link:
-                            theater_name = theater_link.text.strip()
-                            print(f"  Found theater: {theater_name}")
-                        
-                        # Enhanced address extraction with multiple approaches
-                        theater_address = "Unknown"
-                        
-                        # APPROACH 1: Look for aside directly after theater link within same parent
-                        if theater_link:
-                            theater_section = theater_link.parent
-                            if theater_section:
-                                # Check for aside as direct sibling
-                                aside_elem = theater_section.select_one('aside')
-                                if aside_elem and aside_elem.text:
-                                    theater_address = aside_elem.text.strip()
-                                    print(f"  Found address (approach 1): {theater_address}")
-                        
-                        # APPROACH 2: Try to find any aside within the entire purchase item that's near a theater link
-                        if theater_address == "Unknown":
-                            theater_sections = item.select('.list-item__description--additional-movie-info-section')
-                            for section in theater_sections:
-                                if section.select_one('a.dark__link[href*="theater-page"]'):
-                                    aside_elem = section.select_one('aside')
-                                    if aside_elem and aside_elem.text:
-                                        theater_address = aside_elem.text.strip()
-                                        print(f"  Found address (approach 2): {theater_address}")
-                                        break
-                                        
-                        # APPROACH 3: Look for any aside element in the container 
-                        if theater_address == "Unknown":
-                            aside_elems = item.select('aside')
-                            for aside in aside_elems:
-                                if aside.text and re.search(r'\d+.*\d{5}', aside.text):  # Look for text with street number and zip code
-                                    theater_address = aside.text.strip()
-                                    print(f"  Found address (approach 3): {theater_address}")
-                                    break
-                                    
-                        # APPROACH 4: Look for any element with address-like content using text analysis
-                        if theater_address == "Unknown" and theater_name != "Unknown":
-                            # Find elements that might contain addresses by checking for address patterns
-                            for elem in item.select('div, span, p'):
-                                text = elem.text.strip()
-                                # Look for common address patterns
-                                if (re.search(r'\d+\s+\w+\s+(?:St|Ave|Rd|Blvd|Lane|Dr|Circle|Hwy|Highway|Pkwy|Parkway)', text, re.IGNORECASE) or
-                                    re.search(r'\w+,\s*[A-Z]{2}\s*\d{5}', text)):  # City, State ZIP
-                                    theater_address = text
-                                    print(f"  Found address (approach 4): {theater_address}")
-                                    break
-
-                        # Add to the purchase data collection
-                        all_purchase_data.append({
-                            "movie": movie_name,
-                            "date": date_time,
-                            "theater": theater_name,
-                            "address": theater_address,
-                            "page": current_page
-                        })
+                            rows = [_record_row(record) for record in records if record is not None]
+                            writer.writerows(rows)
+                            row_count += len(rows)
                 
-                # If no data was found on this page, we've reached the end
-                if not page_has_data:
-                    print(f"DEBUG: No data found on page {current_page} - reached the end of purchase history")
-                    break
+                        # If no data was found on this page, we've reached the end
+                        if not page_has_data:
+                            print(f"DEBUG: No data found on page {current_page} - reached the end of purchase history")
+                            break
+
+                        # Fandango pages hold a fixed number of items, so a short page is the last one
+                        if current_page == 1:
+                            page_size = len(purchase_items)
+                        elif page_size > 1 and len(purchase_items) < page_size:
+                            print(f"DEBUG: Page {current_page} has fewer items than page 1 - reached the end of purchase history")
+                            break
                     
-                # Move to the next page
-                current_page += 1
-            
-            # Save all combined data to CSV
-            if all_purchase_data:
-                csv_path = os.path.join(download_dir, "FandangoPurchaseHistory.csv")
-                with open(csv_path, "w", encoding="utf-8") as f:
-                    f.write("Movie,Date,Theater,Address,Page\n")
-                    for item in all_purchase_data:
-                        f.write(f"\"{item['movie']}\",\"{item['date']}\",\"{item['theater']}\",\"{item['address']}\",{item['page']}\n")
-                
-                print(f"DEBUG: Saved {len(all_purchase_data)} total purchase records to {csv_path}")
+                        # Move to the next page
+                        current_page += 1
+
+                # Check the streamed CSV before returning success
+                if row_count:
+                    # Every page has been written, so replace any previous export in one step
+                    os.replace(part_path, csv_path)
+                    print(f"DEBUG: Saved {row_count} total purchase records to {csv_path}")
                 
-                # Make sure the saved files actually exist before returning success
-                if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
-                    download_successful = True
-                    print("DEBUG: Verified that files were successfully saved")
+                    # Make sure the saved files actually exist before returning success
+                    if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
+                        download_successful = True
+                        print("DEBUG: Verified that files were successfully saved")
+                    else:
+                        download_successful = False
+                        print("DEBUG: Failed to save files or files are empty")
                 else:
+                    print("WARNING: No purchase data was collected across all pages")
                     download_successful = False
-                    print("DEBUG: Failed to save files or files are empty")
-            else:
-                print("WARNING: No purchase data was collected across all pages")
-                download_successful = False
+            finally:
+                # Remove the partial file after an error, or the header-only one when
+                # nothing was collected, leaving any previous export untouched
+                if os.path.exists(part_path):
+                    os.remove(part_path)
 
         except TimeoutException as e:
             print(f"ERROR: Timeout during process: {e}")
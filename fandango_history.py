@@ -1,10 +1,85 @@
 import os
-import csv
+import calendar
+import contextlib
+import itertools
+import logging
 import re
+import functools
+import operator
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
-from markdown_generator import Markdown  # Import the Markdown class
+from markdown_generator import MARKDOWN  # Shared Markdown generator
+from history_util import iter_csv_rows, has_heading, file_has_heading
+
+log = logging.getLogger(__name__)
+
+# Section heading written by generate_movies_attended_markdown
+_MOVIES_ATTENDED_HEADER = b"## Movies Attended"
+
+# Full month names indexed by month number (index 0 is empty)
+_MONTH_NAMES = tuple(calendar.month_name)
+
+# CSV columns read from FandangoPurchaseHistory.csv, in entry tuple order
+_CSV_COLUMNS = ('Movie', 'Date', 'Theater', 'Address')
+
+# Month names and abbreviations, lower-cased, mapped to month numbers
+_MONTHS = {
+    name: number
+    for number, full_name in enumerate((
+        'january', 'february', 'march', 'april', 'may', 'june', 'july',
+        'august', 'september', 'october', 'november', 'december'), start=1)
+    for name in (full_name, full_name[:3])
+}
+
+# One pass over a date string covers every format Fandango exports:
+#   2020-03-09, 3/9/2020, 3/9/20, Monday, Mar 9 2020 at 2:15 PM, March 9, 2020
+_DATE_ANY = re.compile(
+    r'(?<!\d)(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})(?!\d)'
+    r'|(?P<us_m>\d{1,2})/(?P<us_d>\d{1,2})/(?P<us_y>\d{2,4})'
+    r'|(?<!\w)(?P<mon>[A-Za-z]+)\.?\s+(?P<mon_d>\d{1,2}),?\s+(?P<mon_y>\d{4})'
+)
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse various date formats from Fandango history.
+    Results are cached by string, since purchases often share a date.
+    
+    Args:
+        date_str (str): Date string to parse.
+        
+    Returns:
+        Optional[datetime]: Parsed datetime object or None if parsing fails.
+    """
+    if not date_str:
+        return None
+
+    # Take the first match that names a real month and a valid calendar date
+    for match in _DATE_ANY.finditer(date_str):
+        if match['iso_y']:
+            year, month, day = int(match['iso_y']), int(match['iso_m']), int(match['iso_d'])
+        elif match['us_y']:
+            year_text = match['us_y']
+            if len(year_text) == 3:
+                continue
+            year = int(year_text)
+            if len(year_text) == 2:
+                # Same pivot as strptime's %y: 69-99 -> 1900s, 00-68 -> 2000s
+                year += 1900 if year >= 69 else 2000
+            month, day = int(match['us_m']), int(match['us_d'])
+        else:
+            month = _MONTHS.get(match['mon'].lower())
+            if month is None:
+                continue
+            year, day = int(match['mon_y']), int(match['mon_d'])
+
+        try:
+            return datetime(year, month, day)
+        except ValueError:
+            continue
+
+    return None
 
 class FandangoHistoryProcessor:
     """
@@ -20,8 +95,10 @@ class FandangoHistoryProcessor:
         """
         self.target_dir = config.get("TARGET_DIR", "")
         self.fandango_csv_file = self._find_fandango_csv_file()
-        self.markdown_generator = Markdown()  # Initialize the Markdown generator
+        self.markdown_generator = MARKDOWN  # Shared Markdown generator
         self.last_error = None  # Track the last error message
+        # Month directories already created and checked for writability
+        self._ensured_dirs = set()
     
     def _find_fandango_csv_file(self) -> str:
         """
@@ -33,130 +110,96 @@ class FandangoHistoryProcessor:
         download_dir = os.path.expanduser("~/Downloads")
         
         if not os.path.exists(download_dir):
-            print(f"Downloads directory not found: {download_dir}")
+            log.warning("Downloads directory not found: %s", download_dir)
             return ""
         
         # Look for the standard filename
         standard_file = os.path.join(download_dir, "FandangoPurchaseHistory.csv")
         if os.path.exists(standard_file):
-            print(f"Found Fandango CSV file: {standard_file}")
+            log.debug("Found Fandango CSV file: %s", standard_file)
             return standard_file
         
         return ""
     
-    def _parse_date(self, date_str: str) -> Optional[datetime]:
-        """
-        Parse various date formats from Fandango history.
-        
-        Args:
-            date_str (str): Date string to parse.
-            
-        Returns:
-            Optional[datetime]: Parsed datetime object or None if parsing fails.
-        """
-        if not date_str:
-            return None
-            
-        # List of possible date formats to try, in order of preference
-        date_formats = [
-            '%Y-%m-%d',              # YYYY-MM-DD
-            '%m/%d/%Y',              # MM/DD/YYYY
-            '%m/%d/%y',              # MM/DD/YY
-            '%A, %b %d %Y at %I:%M %p',  # Monday, Mar 9 2020 at 2:15 PM
-            '%a, %b %d %Y at %I:%M %p',  # Mon, Mar 9 2020 at 2:15 PM
-            '%B %d, %Y',             # March 9, 2020
-            '%b %d, %Y'              # Mar 9, 2020
-        ]
-        
-        # Try each format until one works
-        for date_format in date_formats:
-            try:
-                return datetime.strptime(date_str, date_format)
-            except ValueError:
-                continue
-        
-        # If the above formats don't work, try to extract the date from the string
-        # using regular expressions to handle non-standard formats
-        date_patterns = [
-            r'(\w+, \w+ \d{1,2} \d{4})',       # Monday, Mar 9 2020
-            r'(\w+ \d{1,2}, \d{4})',           # March 9, 2020
-            r'(\d{1,2}/\d{1,2}/\d{2,4})'       # MM/DD/YY or MM/DD/YYYY
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, date_str)
-            if match:
-                extracted_date = match.group(1)
-                
-                # Try each date format with the extracted date string
-                for date_format in date_formats:
-                    try:
-                        return datetime.strptime(extracted_date, date_format)
-                    except ValueError:
-                        continue
-        
-        return None
-    
     def get_purchases_by_date(self) -> defaultdict:
         """
         Parse the CSV file and organize Fandango purchases by date.
 
         Returns:
-            defaultdict: Dictionary where keys are dates (YYYY-MM-DD) and values are lists of movie dictionaries.
+            defaultdict: Dictionary where keys are dates (YYYY-MM-DD) and values are lists of
+                (movie_name, theater_name, theater_address) tuples.
         """
         purchases_by_date = defaultdict(list)
         
         # Check for CSV file
         if not self.fandango_csv_file or not os.path.exists(self.fandango_csv_file):
             self.last_error = "Fandango CSV file not found"
-            print(f"{self.last_error}: {self.fandango_csv_file}")
+            log.error("%s: %s", self.last_error, self.fandango_csv_file)
             return purchases_by_date
             
-        # Parse the CSV file to get movie entries
+        # Parse the CSV file and group movie entries by date in a single pass
         try:
-            movie_entries = []
-            
-            with open(self.fandango_csv_file, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    movie_entries.append({
-                        'movie_name': row.get('Movie', ''),
-                        'date_time': row.get('Date', ''),
-                        'theater_name': row.get('Theater', ''),
-                        'theater_address': row.get('Address', '')
-                    })
-            
-            if not movie_entries:
-                self.last_error = "No movie entries found in the CSV file"
-                print(self.last_error)
-                return purchases_by_date
-                
+            entry_count = 0
             # Track entries with missing dates
             entries_with_missing_dates = 0
+            # Entries already added, keyed by the raw showtime, and how many repeats were dropped
+            seen_entries = set()
+            duplicate_entries = 0
             
-            for entry in movie_entries:
-                # Parse the date and format it
-                date_obj = self._parse_date(entry.get('date_time', ''))
-                if not date_obj:
-                    entries_with_missing_dates += 1
-                    continue
+            with contextlib.closing(iter_csv_rows(self.fandango_csv_file)) as reader:
+                header = next(reader, [])
                 
-                formatted_date = date_obj.strftime('%Y-%m-%d')
+                # Resolve column positions once instead of building a dict per row
+                missing_columns = [name for name in _CSV_COLUMNS if name not in header]
+                if missing_columns:
+                    self.last_error = f"Fandango CSV file is missing columns: {', '.join(missing_columns)}"
+                    log.error("%s", self.last_error)
+                    return purchases_by_date
+                indices = [header.index(name) for name in _CSV_COLUMNS]
+                row_width = max(indices) + 1
+                get_columns = operator.itemgetter(*indices)
+                # Bind per-row callables to locals once instead of resolving them every row
+                parse_date = _parse_date
+                mark_seen = seen_entries.add
                 
-                # Add the full movie entry to the date's list
-                purchases_by_date[formatted_date].append({
-                    'movie_name': entry.get('movie_name', ''),
-                    'theater_name': entry.get('theater_name', ''),
-                    'theater_address': entry.get('theater_address', '')
-                })
+                for row in reader:
+                    entry_count += 1
+                    if len(row) < row_width:
+                        row = list(row) + [''] * (row_width - len(row))
+                    movie_name, date_time, theater_name, theater_address = get_columns(row)
+                    
+                    # Parse the date and format it
+                    date_obj = parse_date(date_time)
+                    if not date_obj:
+                        entries_with_missing_dates += 1
+                        continue
+                    
+                    formatted_date = date_obj.date().isoformat()
+                    # Add the movie entry to the date's list as a compact tuple, skipping
+                    # rows repeated in the export. The key uses the full showtime, so two
+                    # showings of the same movie on one day are both kept
+                    entry = (movie_name, theater_name, theater_address)
+                    seen_key = (date_time, entry)
+                    if seen_key in seen_entries:
+                        duplicate_entries += 1
+                        continue
+                    mark_seen(seen_key)
+                    purchases_by_date[formatted_date].append(entry)
+            
+            if not entry_count:
+                self.last_error = "No movie entries found in the CSV file"
+                log.error("%s", self.last_error)
+                return purchases_by_date
             
             # Debug: Show found dates
-            print(f"Found Fandango purchase history for {len(purchases_by_date)} dates from CSV")
+            log.info("Found Fandango purchase history for %s dates from CSV", len(purchases_by_date))
             if entries_with_missing_dates > 0:
-                print(f"Skipped {entries_with_missing_dates} entries with missing or invalid dates")
+                log.info("Skipped %s entries with missing or invalid dates", entries_with_missing_dates)
+            if duplicate_entries > 0:
+                log.info("Skipped %s duplicate entries", duplicate_entries)
                 
-            date_sample = list(purchases_by_date.keys())[:5] if purchases_by_date else []
-            print(f"Sample dates: {date_sample}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Sample dates: %s", list(itertools.islice(purchases_by_date, 5)))
             
             if not purchases_by_date:
                 self.last_error = "No purchase dates could be extracted from the movie entries"
@@ -165,9 +208,21 @@ class FandangoHistoryProcessor:
             
         except Exception as e:
             self.last_error = f"Error parsing purchase data: {str(e)}"
-            print(self.last_error)
+            log.error("%s", self.last_error)
             return purchases_by_date
     
+    def _movies_attended_payload(self, purchase_data: List[Tuple[str, str, str]]) -> bytes:
+        """
+        Generate the Movies Attended section for one date, encoded for a binary write.
+
+        Args:
+            purchase_data (List[Tuple[str, str, str]]): Movie entries for the date.
+
+        Returns:
+            bytes: UTF-8 encoded markdown section.
+        """
+        return self.markdown_generator.generate_movies_attended_markdown(purchase_data).encode("utf-8")
+
     def file_already_has_fandango_history(self, file_path: str) -> bool:
         """
         Check if a file already contains Fandango history section.
@@ -179,16 +234,12 @@ class FandangoHistoryProcessor:
             bool: True if the file already has Fandango history, False otherwise.
         """
         try:
-            if not os.path.exists(file_path):
-                return False
-                
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
             # Check if the file already contains Movies Attended section
-            return "## Movies Attended" in content
+            return file_has_heading(file_path, _MOVIES_ATTENDED_HEADER)
+        except FileNotFoundError:
+            return False
         except Exception as e:
-            print(f"Error checking file for Fandango history: {e}")
+            log.error("Error checking file for Fandango history: %s", e)
             return False
 
     def delete_fandango_history_file(self) -> bool:
@@ -199,15 +250,15 @@ class FandangoHistoryProcessor:
             bool: True if deletion was successful, False otherwise.
         """
         if not self.fandango_csv_file or not os.path.exists(self.fandango_csv_file):
-            print(f"Fandango CSV file not found for deletion: {self.fandango_csv_file}")
+            log.warning("Fandango CSV file not found for deletion: %s", self.fandango_csv_file)
             return False
             
         try:
             os.remove(self.fandango_csv_file)
-            print(f"Successfully deleted Fandango CSV file: {self.fandango_csv_file}")
+            log.info("Successfully deleted Fandango CSV file: %s", self.fandango_csv_file)
             return True
         except Exception as e:
-            print(f"Error deleting Fandango CSV file {self.fandango_csv_file}: {e}")
+            log.error("Error deleting Fandango CSV file %s: %s", self.fandango_csv_file, e)
             return False
 
     def append_purchases_to_files(self, delete_after_processing: bool = False) -> bool:
@@ -222,97 +273,116 @@ class FandangoHistoryProcessor:
         Returns:
             bool: True if processing was successful, False otherwise.
         """
-        if not os.path.exists(self.target_dir):
-            print(f"Target directory not found: {self.target_dir}")
-            return False
-            
-        # Check if target directory is writable
+        # A single access() call covers the common case; os.access is also False
+        # for a missing path, so existence is only checked to pick the message
         if not os.access(self.target_dir, os.W_OK):
-            print(f"Error: Target directory is not writable: {self.target_dir}")
+            if not os.path.exists(self.target_dir):
+                log.error("Target directory not found: %s", self.target_dir)
+            else:
+                log.error("Error: Target directory is not writable: %s", self.target_dir)
             return False
 
         # Get purchases from CSV
         purchases_by_date = self.get_purchases_by_date()
         
         if not purchases_by_date:
-            print("No Fandango purchase history data found to process.")
+            log.warning("No Fandango purchase history data found to process.")
             return False
 
+        # Per-file outcomes are counted and reported once at the end;
+        # only errors are printed as they happen
         processed_files = 0
         created_files = 0
-        # Iterate through each date found in the Fandango history
-        for file_date, purchase_data in purchases_by_date.items():
+        skipped_files = 0
+        # Target directory with exactly one trailing separator, so paths below it
+        # can be assembled with plain f-strings instead of os.path.join per date
+        base_dir = os.path.join(self.target_dir, '')
+        sep = os.sep
+        # Group dates in sorted order by month directory, TARGET_DIR/YYYY/MM-Month/,
+        # slicing the parts straight out of the YYYY-MM key
+        month_groups = []
+        for year_month, month_dates in itertools.groupby(
+                sorted(purchases_by_date), key=operator.itemgetter(slice(0, 7))):
+            month_number = year_month[5:7]
+            target_subdir = f"{base_dir}{year_month[:4]}{sep}{month_number}-{_MONTH_NAMES[int(month_number)]}"
+            month_groups.append((target_subdir, list(month_dates)))
+
+        # Create and check every month directory up front, so the write loop below only opens files
+        for target_subdir, _ in month_groups:
+            if target_subdir in self._ensured_dirs:
+                continue
             try:
-                # Extract year and month name from the date string (YYYY-MM-DD)
-                date_obj = datetime.strptime(file_date, '%Y-%m-%d')
-                year = date_obj.strftime('%Y')
-                month = date_obj.strftime('%m') # Get month number (e.g., 02)
-                month_name = date_obj.strftime('%B') # Get full month name (e.g., February)
+                os.makedirs(target_subdir, exist_ok=True)
+            except OSError as e:
+                log.error("Error creating directory %s: %s", target_subdir, e)
+                continue
+
+            # Check if subdirectory is writable
+            if not os.access(target_subdir, os.W_OK):
+                log.error("Error: Directory is not writable: %s", target_subdir)
+                continue
+            self._ensured_dirs.add(target_subdir)
 
-                # Construct the target directory path as TARGET_DIR/YYYY/MM-Month/
-                target_subdir = os.path.join(self.target_dir, year, f"{month}-{month_name}")
-                file_name = f"{file_date}.md"
-                file_path = os.path.join(target_subdir, file_name)
+        for target_subdir, month_dates in month_groups:
+            # Directories that could not be created or written were reported above
+            if target_subdir not in self._ensured_dirs:
+                continue
 
-                print(f"Processing Fandango date: {file_date} -> {file_path}")
+            # One directory listing replaces a per-date existence check
+            try:
+                existing_files = set(os.listdir(target_subdir))
+            except OSError as e:
+                log.error("Error listing directory %s: %s", target_subdir, e)
+                continue
 
-                # Ensure the target subdirectory exists
+            for file_date in month_dates:
+                purchase_data = purchases_by_date[file_date]
                 try:
-                    os.makedirs(target_subdir, exist_ok=True)
-                except OSError as e:
-                    print(f"Error creating directory {target_subdir}: {e}")
-                    continue
-                    
-                # Check if subdirectory is writable
-                if not os.access(target_subdir, os.W_OK):
-                    print(f"Error: Directory is not writable: {target_subdir}")
-                    continue
-                
-                # Generate markdown for the movie attendance
-                movies_markdown = self.markdown_generator.generate_movies_attended_markdown(purchase_data)
+                    file_name = f"{file_date}.md"
+                    file_path = f"{target_subdir}{sep}{file_name}"
 
-                # Check if the target file exists
-                if os.path.exists(file_path):
-                    print(f"  File exists: {file_path}")
-                    
-                    # Check if file is writable
-                    if not os.access(file_path, os.W_OK):
-                        print(f"  Error: File is not writable: {file_path}")
-                        continue
-                        
-                    # Check if file already has Fandango history section
-                    if self.file_already_has_fandango_history(file_path):
-                        print(f"  File {file_name} already has Fandango history section. Skipping.")
-                        continue
-                    else:
-                        # Append Fandango history to existing file
+                    if file_name in existing_files:
+                        # Check for an existing Fandango history section and append through the same handle
                         try:
-                            with open(file_path, mode="a", encoding="utf-8") as file:
-                                file.write(movies_markdown)
-                            print(f"  Appended Fandango history to existing file: {file_name}")
-                            processed_files += 1
+                            with open(file_path, mode="r+b") as file:
+                                has_history = has_heading(file, _MOVIES_ATTENDED_HEADER)
+                                if not has_history:
+                                    # Only generate markdown once we know it will be written
+                                    payload = self._movies_attended_payload(purchase_data)
+                                    file.seek(0, os.SEEK_END)
+                                    file.write(payload)
+                        except PermissionError:
+                            log.error("  Error: File is not writable: %s", file_path)
+                            continue
                         except Exception as e:
-                            print(f"  Error appending to existing file {file_name}: {e}")
+                            log.error("  Error appending to existing file %s: %s", file_name, e)
+                            continue
 
-                else:
-                    # File does not exist, create it and add history
-                    print(f"  File does not exist, creating: {file_path}")
-                    try:
-                        with open(file_path, mode="w", encoding="utf-8") as file:
-                            # Add the movie attendance section
-                            file.write(movies_markdown)
-                        print(f"  Created file and added Fandango history: {file_name}")
-                        created_files += 1
-                    except Exception as e:
-                        print(f"  Error creating file {file_name}: {e}")
-            except ValueError:
-                 print(f"Skipping invalid date format: {file_date}")
-                 continue
-            except Exception as e:
-                 print(f"An unexpected error occurred processing date {file_date}: {e}")
-                 continue
+                        if has_history:
+                            skipped_files += 1
+                            continue
+                        processed_files += 1
+
+                    else:
+                        # File does not exist, create it and add history
+                        try:
+                            payload = self._movies_attended_payload(purchase_data)
+                            with open(file_path, mode="wb") as file:
+                                # Add the movie attendance section
+                                file.write(payload)
+                            created_files += 1
+                        except Exception as e:
+                            log.error("  Error creating file %s: %s", file_name, e)
+                except ValueError:
+                     log.warning("Skipping invalid date format: %s", file_date)
+                     continue
+                except Exception as e:
+                     log.error("An unexpected error occurred processing date %s: %s", file_date, e)
+                     continue
 
-        print(f"Finished processing Fandango history. Appended to {processed_files} existing file(s), created {created_files} new file(s).")
+        log.info("Finished processing Fandango history. Appended to %s existing file(s), "
+                 "created %s new file(s), skipped %s file(s) that already had the section.",
+                 processed_files, created_files, skipped_files)
         
         # Delete the history files if requested and there was at least one file processed
         if delete_after_processing and (processed_files > 0 or created_files > 0):
@@ -1,10 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from api_util import make_api_request
 from utility_parser import UtilityParser
-from markdown_generator import Markdown
+from markdown_generator import MARKDOWN
 
-def fetch_and_process_api_data(api_type, config):
+# Parser and generator are stateless, so one instance of each serves every call
+_PARSER = UtilityParser()
+_MD = MARKDOWN
+
+@lru_cache(maxsize=16)
+def _dispatch(api_type):
     """
-    Generic function to fetch and process data from any API.
+    Resolve the parse and generate methods for an API type once.
+    """
+    name = api_type.lower()
+    return getattr(_PARSER, f'parse_{name}'), getattr(_MD, f'generate_{name}_markdown')
+
+def _fetch_api_data(api_type, config, log=print):
+    """
+    Fetch the raw response for one API type, or None if it has no endpoint configured.
+    Progress messages go to log, which defaults to print.
     """
     # Get API endpoint and the single RapidAPI key
     endpoint = config.get(f'{api_type}_ENDPOINT')
@@ -13,7 +28,7 @@ def fetch_and_process_api_data(api_type, config):
     
     # Check if endpoint is specified
     if not endpoint:
-        print(f"WARNING: {api_type}_ENDPOINT is not set. Skipping {api_type} API data fetch.")
+        log(f"WARNING: {api_type}_ENDPOINT is not set. Skipping {api_type} API data fetch.")
         return None
     
     # Special handling for WEATHER API: ensure latitude and longitude are included
@@ -23,18 +38,61 @@ def fetch_and_process_api_data(api_type, config):
         if "longitude" not in params:
             params["longitude"] = config.get("LONGITUDE")
     
-    print(f"Making {api_type} API request to: {endpoint}")
-    print(f"With parameters: {params}")
+    log(f"Making {api_type} API request to: {endpoint}")
+    log(f"With parameters: {params}")
     
     # Call the API
-    data = make_api_request(key, endpoint, params)
-    
-    # Parse the response
-    parser = UtilityParser()
-    parse_method = getattr(parser, f'parse_{api_type.lower()}')
+    return make_api_request(key, endpoint, params, log=log)
+
+def _render_api_data(api_type, data):
+    """
+    Parse a raw API response and generate its markdown with the cached methods.
+    """
+    parse_method, generate_method = _dispatch(api_type)
     parsed_data = parse_method(data)
-    
-    # Generate markdown
-    markdown_generator = Markdown()
-    generate_method = getattr(markdown_generator, f'generate_{api_type.lower()}_markdown')
-    return generate_method(parsed_data)
\ No newline at end of file
+    return generate_method(parsed_data)
+
+def fetch_and_process_api_data(api_type, config):
+    """
+    Generic function to fetch and process data from any API.
+    """
+    data = _fetch_api_data(api_type, config)
+    if data is None:
+        return None
+    return _render_api_data(api_type, data)
+
+def fetch_and_process_api_data_many(api_types, config, type_configs=None, max_workers=8):
+    """
+    Fetch and process data from several APIs at once.
+    The HTTP requests run concurrently in a thread pool since they are network bound;
+    parsing and markdown generation then run serially in the order given. Each request's
+    messages are collected and printed together in that order, so the log doesn't interleave.
+
+    Args:
+        api_types (list): API types to fetch, e.g. ["NEWS", "WEATHER"].
+        config (dict): Configuration used for every API type.
+        type_configs (dict, optional): Per API type configuration that replaces config.
+        max_workers (int): Maximum number of concurrent requests.
+
+    Returns:
+        dict: Markdown (or None) keyed by API type.
+    """
+    if not api_types:
+        return {}
+    type_configs = type_configs or {}
+
+    messages = {api_type: [] for api_type in api_types}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(api_types))) as executor:
+        futures = {
+            api_type: executor.submit(_fetch_api_data, api_type, type_configs.get(api_type, config),
+                                      messages[api_type].append)
+            for api_type in api_types
+        }
+
+    results = {}
+    for api_type in api_types:
+        if messages[api_type]:
+            print("\n".join(messages[api_type]))
+        data = futures[api_type].result()
+        results[api_type] = None if data is None else _render_api_data(api_type, data)
+    return results
@@ -1,6 +1,21 @@
-from typing import Any
+from typing import Any, Optional
 import os
 
+def _probe(path: str) -> Optional[os.stat_result]:
+    """
+    Stat a path once, treating a missing path as None instead of an error.
+
+    Args:
+        path (str): Path to stat.
+
+    Returns:
+        Optional[os.stat_result]: Stat result, or None if the path does not exist.
+    """
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
 class Append:
     """
     Generic class for appending data to a file.
@@ -20,29 +35,24 @@ class Append:
         try:
             # Validate that the directory exists, create it if it doesn't
             directory = os.path.dirname(file_path)
-            if directory and not os.path.exists(directory):
+            if directory and _probe(directory) is None:
                 try:
                     os.makedirs(directory, exist_ok=True)
                     print(f"Created directory: {directory}")
                 except OSError as e:
                     print(f"Error creating directory {directory}: {e}")
                     return False
-            
-            # Check if the directory is writable
-            if directory and not os.access(directory, os.W_OK):
-                print(f"Error: Directory {directory} is not writable")
-                return False
                 
-            # If appending to an existing file, check if it's writable
-            if os.path.exists(file_path) and not os.access(file_path, os.W_OK):
+            # Open directly instead of pre-checking access; a read-only file or
+            # directory surfaces here as PermissionError
+            if not isinstance(data, str):
+                data = str(data)
+            try:
+                with open(file_path, 'a', encoding='utf-8') as f:
+                    f.write(data + '\n')
+            except PermissionError:
                 print(f"Error: File {file_path} is not writable")
                 return False
-                
-            # Now perform the write operation
-            with open(file_path, 'a', encoding='utf-8') as f:
-                if not isinstance(data, str):
-                    data = str(data)
-                f.write(data + '\n')
             return True
         except Exception as e:
             print(f"Error appending to file {file_path}: {e}")
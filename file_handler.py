@@ -1,13 +1,98 @@
 import os
-import json
+import stat
+
+# orjson parses JSON in C and is much faster; fall back to the stdlib when it isn't installed
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
 from datetime import datetime, timedelta
 from typing import Optional
 
+def load_config(config_path: str = 'config.json') -> dict:
+    """
+    Load configuration from a JSON file with orjson when available.
+    
+    Args:
+        config_path (str): Path to the configuration file.
+        
+    Returns:
+        dict: Configuration data.
+    """
+    # Parsed on every call: a read and parse is cheaper than a stat plus copying a cached dict
+    with open(config_path, 'rb') as f:
+        return _loads(f.read())
+
+# Target directories already checked or created in this process; they are assumed
+# to stay valid, so later handlers skip the stat
+_VALIDATED_DIRS = set()
+
+def _validate_target_dir(target_dir: str) -> Optional[str]:
+    """
+    Make sure the target directory exists and is a directory, creating it if missing.
+    
+    Args:
+        target_dir (str): Target directory from the configuration.
+        
+    Returns:
+        Optional[str]: target_dir if it is usable, otherwise None.
+    """
+    if not target_dir:
+        print(f"ERROR: No target directory specified in config.")
+        return None
+    if target_dir in _VALIDATED_DIRS:
+        return target_dir
+    
+    # One stat answers both "does it exist" and "is it a directory"
+    try:
+        st = os.stat(target_dir)
+    except FileNotFoundError:
+        print(f"Target directory specified in config does not exist: {target_dir}")
+        try:
+            # Create the directory structure if it doesn't exist
+            os.makedirs(target_dir, exist_ok=True)
+            print(f"Created target directory: {target_dir}")
+        except OSError as e:
+            print(f"ERROR: Failed to create target directory {target_dir}: {e}")
+            print(f"ERROR details - errno: {e.errno}, strerror: {e.strerror}, filename: {e.filename}")
+            return None  # Invalid if creation fails
+    except OSError as e:
+        print(f"ERROR: Cannot access target directory {target_dir}: {e}")
+        return None
+    else:
+        if not stat.S_ISDIR(st.st_mode):
+            print(f"ERROR: Target path specified in config is not a directory: {target_dir}")
+            return None  # Invalid if not a directory
+    
+    _VALIDATED_DIRS.add(target_dir)
+    return target_dir
+
 class FILE_HANDLER:
     """
     Class for handling file operations related to date-based markdown files.
     """
     
+    # Handlers already built by get(), keyed by config path
+    _instance_cache = {}
+    
+    @classmethod
+    def get(cls, config_path: str = 'config.json') -> 'FILE_HANDLER':
+        """
+        Return the handler for a configuration file, building it on first use.
+        
+        Args:
+            config_path (str): Path to the configuration file.
+            
+        Returns:
+            FILE_HANDLER: Shared handler for config_path.
+        """
+        handler = cls._instance_cache.get(config_path)
+        if handler is None:
+            handler = cls._instance_cache[config_path] = cls(config_path)
+        return handler
+    
     def __init__(self, config_path: str = 'config.json'):
         """
         Initialize the file handler with configuration.
@@ -16,24 +101,8 @@ class FILE_HANDLER:
             config_path (str): Path to the configuration file.
         """
         self.config = self._load_config(config_path)
-        self.target_dir = self.config.get('TARGET_DIR', '')
-        # Check if the target directory exists upon initialization
-        if not self.target_dir:
-            print(f"ERROR: No target directory specified in config.")
-            self.target_dir = None
-        elif not os.path.exists(self.target_dir):
-            print(f"Target directory specified in config does not exist: {self.target_dir}")
-            try:
-                # Create the directory structure if it doesn't exist
-                os.makedirs(self.target_dir, exist_ok=True)
-                print(f"Created target directory: {self.target_dir}")
-            except OSError as e:
-                print(f"ERROR: Failed to create target directory {self.target_dir}: {e}")
-                print(f"ERROR details - errno: {e.errno}, strerror: {e.strerror}, filename: {e.filename}")
-                self.target_dir = None  # Mark as invalid if creation fails
-        elif not os.path.isdir(self.target_dir):
-            print(f"ERROR: Target path specified in config is not a directory: {self.target_dir}")
-            self.target_dir = None  # Mark as invalid if not a directory
+        # Check the target directory upon initialization, creating it if needed
+        self.target_dir = _validate_target_dir(self.config.get('TARGET_DIR', ''))
 
     def _load_config(self, config_path: str) -> dict:
         """
@@ -45,5 +114,4 @@ class FILE_HANDLER:
         Returns:
             dict: Configuration data.
         """
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
\ No newline at end of file
+        return load_config(config_path)
\ No newline at end of file
@@ -0,0 +1,69 @@
+import os
+import csv
+import mmap
+from typing import BinaryIO, Iterator, List
+
+# Read buffer size for CSV files
+_CSV_BUFFER_BYTES = 1 << 20
+
+# Bytes read from the end of a file before falling back to a full mmap search;
+# files up to this size are read whole
+_TAIL_SCAN_BYTES = 64 * 1024
+
+def iter_csv_rows(csv_path: str) -> Iterator[List[str]]:
+    """
+    Yield the header and then every data row of a CSV file, streaming it in one pass.
+    Callers locate their columns from the header and skip short rows themselves.
+
+    Args:
+        csv_path (str): Path to the CSV file.
+
+    Returns:
+        Iterator[List[str]]: Header row followed by data rows.
+    """
+    # newline='' is the csv module's documented idiom; a 1 MiB buffer cuts read syscalls
+    with open(csv_path, 'r', encoding='utf-8', buffering=_CSV_BUFFER_BYTES, newline='') as file:
+        yield from csv.reader(file)
+
+def has_heading(file: BinaryIO, heading: bytes) -> bool:
+    """
+    Search an open binary file for a section heading without decoding it.
+    Sections are appended at the end of a journal, so the last _TAIL_SCAN_BYTES
+    are checked first; only if the heading isn't there is the rest of a larger
+    file memory-mapped and searched.
+
+    Args:
+        file (BinaryIO): File opened in binary read mode, positioned at the start.
+        heading (bytes): Heading to look for, e.g. b"## Movies Attended".
+
+    Returns:
+        bool: True if the heading is present, False otherwise.
+    """
+    size = os.fstat(file.fileno()).st_size
+    if size <= _TAIL_SCAN_BYTES:
+        return file.read(size).find(heading) != -1
+
+    tail_start = size - _TAIL_SCAN_BYTES
+    file.seek(tail_start)
+    if file.read(_TAIL_SCAN_BYTES).find(heading) != -1:
+        return True
+    # Overlap the tail by one heading length so a heading split across the boundary is found
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm.find(heading, 0, tail_start + len(heading) - 1) != -1
+
+def file_has_heading(file_path: str, heading: bytes) -> bool:
+    """
+    Check whether the file at file_path contains a section heading.
+
+    Args:
+        file_path (str): Path to the markdown file.
+        heading (bytes): Heading to look for.
+
+    Returns:
+        bool: True if the heading is present, False otherwise.
+
+    Raises:
+        OSError: If the file can't be opened.
+    """
+    with open(file_path, 'rb') as file:
+        return has_heading(file, heading)
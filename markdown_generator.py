@@ -1,5 +1,151 @@
-from typing import List, Dict
-from datetime import datetime
+import io
+import sys
+from typing import List, Dict, Tuple
+from datetime import date, datetime
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def _format_day(day: date) -> str:
+    """
+    Formats a date as YYYY-MM-DD, cached so repeated calls on the same day skip strftime.
+
+    Args:
+        day (date): Date to format.
+
+    Returns:
+        str: The date as YYYY-MM-DD.
+    """
+    return day.strftime("%Y-%m-%d")
+
+def _today_str() -> str:
+    """
+    Returns today's date as YYYY-MM-DD. The cache is keyed on the date itself,
+    so a long-running process still rolls over at midnight.
+
+    Returns:
+        str: Today's date as YYYY-MM-DD.
+    """
+    return _format_day(date.today())
+
+# fromisoformat accepts a trailing Z from Python 3.11 on
+_PY311 = sys.version_info >= (3, 11)
+
+def _parse_iso(timestamp: str) -> datetime:
+    """
+    Parses an ISO 8601 timestamp, accepting a trailing Z on every Python version.
+
+    Args:
+        timestamp (str): ISO 8601 timestamp, optionally with a Z suffix.
+
+    Returns:
+        datetime: The parsed timestamp.
+    """
+    if _PY311 or not timestamp.endswith('Z'):
+        return datetime.fromisoformat(timestamp)
+    return datetime.fromisoformat(timestamp[:-1] + '+00:00')
+
+@lru_cache(maxsize=64)
+def _fmt_iso_date(timestamp: str) -> str:
+    """
+    Formats an ISO 8601 timestamp such as 2024-03-01T07:00:00Z as DD-MM-YYYY.
+
+    Args:
+        timestamp (str): ISO 8601 timestamp, optionally with a Z suffix.
+
+    Returns:
+        str: The date as DD-MM-YYYY.
+    """
+    # The date is the leading YYYY-MM-DD, so slice it out without building a datetime
+    if len(timestamp) >= 10 and timestamp[4] == '-' and timestamp[7] == '-' \
+            and timestamp[:4].isdigit() and timestamp[5:7].isdigit() and timestamp[8:10].isdigit():
+        return f"{timestamp[8:10]}-{timestamp[5:7]}-{timestamp[:4]}"
+    return _parse_iso(timestamp).strftime("%d-%m-%Y")
+
+# Unit conversion factors for the weather table
+_C_TO_F_SCALE = 1.8     # °F = °C × 1.8 + 32
+_MM_TO_IN = 0.0393701   # inches per millimetre
+_KMH_TO_MPH = 0.621371  # mph per km/h
+
+def _fmt_temperature(value) -> str:
+    """
+    Formats a Celsius temperature in Fahrenheit (F = C × 9/5 + 32).
+
+    Args:
+        value: Temperature in Celsius.
+
+    Returns:
+        str: e.g. "54.2°F", or "N/A" when missing.
+    """
+    if not value:
+        return "N/A"
+    return f"{value * _C_TO_F_SCALE + 32:.1f}°F"
+
+def _fmt_percent(value) -> str:
+    """
+    Formats a 0-1 probability as a percentage rounded to the nearest whole number.
+
+    Args:
+        value: Probability between 0 and 1.
+
+    Returns:
+        str: e.g. "45%", or "0%" when missing.
+    """
+    return f"{round(value * 100)}%" if value else "0%"
+
+def _fmt_inches(value) -> str:
+    """
+    Formats a precipitation amount in millimetres as inches (1 mm = 0.0393701 inches).
+
+    Args:
+        value: Amount in millimetres.
+
+    Returns:
+        str: e.g. '0.13"', or '0"' when missing.
+    """
+    inches = value * _MM_TO_IN if value else 0
+    return f"{inches:.2f}\"" if inches else "0\""
+
+def _fmt_mph(value) -> str:
+    """
+    Formats a km/h wind speed in mph (1 km/h = 0.621371 mph).
+
+    Args:
+        value: Wind speed in km/h.
+
+    Returns:
+        str: e.g. "6.2 mph", or "N/A" when missing.
+    """
+    if not value:
+        return "N/A"
+    return f"{value * _KMH_TO_MPH:.1f} mph"
+
+# Weather table rows: (display name, forecast key, formatter)
+_WEATHER_ROWS = (
+    ('Conditions', 'conditionCode', str),
+    ('Max', 'temperatureMax', _fmt_temperature),
+    ('Min', 'temperatureMin', _fmt_temperature),
+    ('Chance of rain', 'precipitationChance', _fmt_percent),
+    ('Rain amount', 'precipitationAmount', _fmt_inches),
+    ('Wind', 'windSpeed', _fmt_mph),
+)
+
+# Section headings and table heads shared by every render
+_NEWS_HDR = "\n## Tomorrow's News - "
+_WEATHER_HDR = "\n## 5-Day Weather Forecast - "
+_TOP_MOVIES_HDR = "\n## Top Movies - "
+_BILLBOARD_HDR = "\n## Billboard Hot 100 - "
+_MOVIES_ATTENDED_HDR = "\n## Movies Attended\n\n"
+_MOVIES_TABLE_HEAD = "| Title | Poster | Description |\n|-------|--------|-------------|\n"
+_UNKNOWN_TITLE = 'Unknown Title'
+_NO_DESCRIPTION = 'No description available'
+_UNKNOWN_ARTIST = 'Unknown Artist'
+_NO_IMAGE = "No image available"
+_MOVIE_IMAGE = '<img src="%s" alt="%s" width="33%%" />'
+_MOVIE_ROW = "| **%s** | %s | %s |\n"
+_BILLBOARD_TABLE_HEAD = "| Song | Artist | Position |\n|------|--------|----------|\n"
+_BB_ROW = "| **%s** | *%s* | %s |\n"
+_POS_WITH_WEEKS = "#%d (%s weeks on chart)"
+_POS_AT_NO1 = "#%d (%s weeks at #1, %s weeks on chart)"
 
 class Markdown:
     """
@@ -20,15 +166,13 @@ class Markdown:
             return "No news items found"
 
         # Start with a new line for spacing
-        markdown = "\n## Tomorrow's News - {}\n\n".format(
-            datetime.now().strftime("%Y-%m-%d")
-        )
+        parts = [_NEWS_HDR, _today_str(), "\n\n"]
 
-        # Add each news item as a markdown link
-        for item in news_items:
-            markdown += "- [{}]({})\n\n".format(item['title'], item['link'])
+        # Add each news item as a markdown link; joined once at the end instead of
+        # copying the whole string on every +=
+        parts.extend(f"- [{item['title']}]({item['link']})\n\n" for item in news_items)
 
-        return markdown
+        return "".join(parts)
 
     def generate_weather_markdown(self, weather_items: List[Dict[str, any]]) -> str:
         """
@@ -43,68 +187,37 @@ class Markdown:
         if not weather_items:
             return "No weather data found"
 
+        # Parse and format each forecast date as DD-MM-YYYY once, before anything is written
+        formatted_dates = [
+            _fmt_iso_date(item['forecastStart'])
+            for item in weather_items
+        ]
+        
+        # Pieces are written to an in-memory buffer and read back once
+        buf = io.StringIO()
+        w = buf.write
+        
         # Start with a new line for spacing
-        markdown = "\n## 5-Day Weather Forecast - {}\n\n".format(
-            datetime.now().strftime("%Y-%m-%d")
-        )
+        w(f"{_WEATHER_HDR}{_today_str()}\n\n")
         
-        # Start the table with weather attribute column
-        markdown += "| Weather |"
-        
-        # Add column headers with dates
-        for item in weather_items:
-            # Parse and format the date as DD-MM-YYYY
-            date_obj = datetime.fromisoformat(item['forecastStart'].replace('Z', '+00:00'))
-            formatted_date = date_obj.strftime("%d-%m-%Y")
-            markdown += f" {formatted_date} |"
-        
-        markdown += "\n|---------|" + "----------|" * len(weather_items) + "\n"
-        
-        # Add rows for each weather attribute
-        attributes = [
-            ('Conditions', 'conditionCode'),
-            ('Max', 'temperatureMax'),
-            ('Min', 'temperatureMin'),
-            ('Chance of rain', 'precipitationChance'),
-            ('Rain amount', 'precipitationAmount'),
-            ('Wind', 'windSpeed')
-        ]
+        # One format template per call: a label cell followed by one cell per forecast
+        row_tmpl = "| {} |" + " {} |" * len(weather_items) + "\n"
         
-        for display_name, attr_key in attributes:
-            markdown += f"| {display_name} |"
-            
-            for item in weather_items:
-                value = item.get(attr_key, '')
-                
-                # Format values appropriately
-                if attr_key == 'temperatureMax' or attr_key == 'temperatureMin':
-                    # Convert Celsius to Fahrenheit: F = C × 9/5 + 32
-                    if value:
-                        fahrenheit = (value * 9/5) + 32
-                        formatted_value = f"{fahrenheit:.1f}°F"
-                    else:
-                        formatted_value = "N/A"
-                elif attr_key == 'precipitationChance':
-                    formatted_value = f"{int(value * 100)}%" if value else "0%"
-                elif attr_key == 'precipitationAmount':
-                    # Convert mm to inches (1 mm = 0.0393701 inches)
-                    inches = value * 0.0393701 if value else 0
-                    formatted_value = f"{inches:.2f}\"" if inches else "0\""
-                elif attr_key == 'windSpeed':
-                    # Convert km/h to mph (1 km/h = 0.621371 mph)
-                    if value:
-                        mph = value * 0.621371
-                        formatted_value = f"{mph:.1f} mph"
-                    else:
-                        formatted_value = "N/A"
-                else:
-                    formatted_value = str(value)
-                    
-                markdown += f" {formatted_value} |"
-            
-            markdown += "\n"
+        # Start the table with weather attribute column and add column headers with dates
+        w(row_tmpl.format("Weather", *formatted_dates))
+        w("|---------|" + "----------|" * len(weather_items) + "\n")
+        
+        # Transpose the forecasts into one column of values per attribute
+        columns = {
+            attr_key: [item.get(attr_key, '') for item in weather_items]
+            for _, attr_key, _ in _WEATHER_ROWS
+        }
+        
+        # Add rows for each weather attribute, each formatted by its own formatter
+        for display_name, attr_key, formatter in _WEATHER_ROWS:
+            w(row_tmpl.format(display_name, *map(formatter, columns[attr_key])))
         
-        return markdown
+        return buf.getvalue()
 
     def generate_top_movies_markdown(self, movie_items: List[Dict[str, str]]) -> str:
         """
@@ -119,35 +232,33 @@ class Markdown:
         if not movie_items:
             return "No movie data found"
 
-        # Start with a new line for spacing
-        markdown = "\n## Top Movies - {}\n\n".format(
-            datetime.now().strftime("%Y-%m-%d")
-        )
+        # Pieces are written to an in-memory buffer and read back once
+        buf = io.StringIO()
+        w = buf.write
         
-        # Create table headers
-        markdown += "| Title | Poster | Description |\n"
-        markdown += "|-------|--------|-------------|\n"
+        # Start with a new line for spacing and create table headers
+        w(f"{_TOP_MOVIES_HDR}{_today_str()}\n\n")
+        w(_MOVIES_TABLE_HEAD)
         
         # Add each movie as a row
         for movie in movie_items:
-            title = movie.get('title', 'Unknown Title')
-            description = movie.get('description', 'No description available')
+            title = movie.get('title', _UNKNOWN_TITLE)
+            description = movie.get('description', _NO_DESCRIPTION)
             image_url = movie.get('image', '')
             
             # Limit description length to avoid extremely long table cells
-            if len(description) > 300:
-                description = description[:297] + "..."
+            description = description if len(description) <= 300 else f"{description[:297]}..."
                 
             # Create image markdown using HTML with reduced size (33%)
             if image_url:
-                image_md = f'<img src="{image_url}" alt="{title}" width="33%" />'
+                image_md = _MOVIE_IMAGE % (image_url, title)
             else:
-                image_md = "No image available"
+                image_md = _NO_IMAGE
             
             # Add the row to the table
-            markdown += f"| **{title}** | {image_md} | {description} |\n"
+            w(_MOVIE_ROW % (title, image_md, description))
         
-        return markdown
+        return buf.getvalue()
 
     def generate_billboard_markdown(self, billboard_items: List[Dict[str, str]], override_date=None) -> str:
         """
@@ -164,42 +275,44 @@ class Markdown:
             return "No Billboard data found"
 
         # Get the chart date from the first item or use override date
-        chart_date = override_date or billboard_items[0].get('date', datetime.now().strftime("%Y-%m-%d"))
+        chart_date = override_date or billboard_items[0].get('date', _today_str())
         
-        # Start with a new line for spacing
-        markdown = "\n## Billboard Hot 100 - {}\n\n".format(chart_date)
-        
-        # Create table headers
-        markdown += "| Song | Artist | Position |\n"
-        markdown += "|------|--------|----------|\n"
-        
-        # Add each song as a row
-        for i, song in enumerate(billboard_items):
-            title = song.get('title', 'Unknown Title')
-            artist = song.get('artist', 'Unknown Artist')
-            position = i + 1  # Chart position is the index + 1
-            weeks_at_no1 = song.get('weeks_at_no1', '0')
-            weeks_on_chart = song.get('weeks_on_chart', '0')
-            
-            # Create position description
-            position_text = f"#{position}"
-            if position == 1 and weeks_at_no1 != '0':
-                position_text += f" ({weeks_at_no1} weeks at #1, {weeks_on_chart} weeks on chart)"
-            else:
-                position_text += f" ({weeks_on_chart} weeks on chart)"
-            
-            # Add the row to the table
-            markdown += f"| **{title}** | *{artist}* | {position_text} |\n"
+        # Start with a new line for spacing and create table headers
+        rows = [
+            f"{_BILLBOARD_HDR}{chart_date}\n\n",
+            _BILLBOARD_TABLE_HEAD,
+        ]
+        
+        # The number one song alone may show its weeks at #1, so it is formatted
+        # before the loop and the remaining rows need no branch
+        head = billboard_items[0]
+        weeks_at_no1 = head.get('weeks_at_no1', '0')
+        weeks_on_chart = head.get('weeks_on_chart', '0')
+        if weeks_at_no1 != '0':
+            position_text = _POS_AT_NO1 % (1, weeks_at_no1, weeks_on_chart)
+        else:
+            position_text = _POS_WITH_WEEKS % (1, weeks_on_chart)
+        rows.append(_BB_ROW % (head.get('title', _UNKNOWN_TITLE), head.get('artist', _UNKNOWN_ARTIST), position_text))
         
-        return markdown
+        # Add each remaining song as a row; chart position is the index + 1
+        rows.extend(
+            _BB_ROW % (
+                song.get('title', _UNKNOWN_TITLE),
+                song.get('artist', _UNKNOWN_ARTIST),
+                _POS_WITH_WEEKS % (position, song.get('weeks_on_chart', '0')),
+            )
+            for position, song in enumerate(billboard_items[1:], 2)
+        )
+        
+        return "".join(rows)
     
-    def generate_movies_attended_markdown(self, movie_items: List[Dict[str, str]]) -> str:
+    def generate_movies_attended_markdown(self, movie_items: List[Tuple[str, str, str]]) -> str:
         """
         Generates markdown content for movies attended at theaters.
         
         Args:
-            movie_items (List[Dict[str, str]]): List of movie items with 'movie_name', 'theater_name', 
-                                               and 'theater_address' keys.
+            movie_items (List[Tuple[str, str, str]]): List of (movie_name, theater_name,
+                                                      theater_address) tuples.
         
         Returns:
             str: Markdown formatted list of movies attended.
@@ -207,23 +320,20 @@ class Markdown:
         if not movie_items:
             return "No movie attendance data found"
             
-        # Start with the header
-        markdown = "\n## Movies Attended\n\n"
+        # Start with the header; the section is joined once so the caller can write it in one call
+        lines = [_MOVIES_ATTENDED_HDR]
         
         # Add each movie as a bullet point with theater info
-        for movie in movie_items:
-            movie_name = movie.get('movie_name', 'Unknown Movie')
-            theater_name = movie.get('theater_name', '')
-            theater_address = movie.get('theater_address', '')
-            
+        for movie_name, theater_name, theater_address in movie_items:
             # Format the entry with theater and address if available
-            entry = f"* {movie_name}"
-            
-            if theater_name:
-                entry += f" at {theater_name}"
-                if theater_address:
-                    entry += f" ({theater_address})"
-            
-            markdown += f"{entry}\n"
+            if not theater_name:
+                lines.append(f"* {movie_name}\n")
+            elif theater_address:
+                lines.append(f"* {movie_name} at {theater_name} ({theater_address})\n")
+            else:
+                lines.append(f"* {movie_name} at {theater_name}\n")
         
-        return markdown
\ No newline at end of file
+        return "".join(lines)
+
+# Markdown holds no state, so callers share this one instance
+MARKDOWN = Markdown()
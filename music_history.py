@@ -1,8 +1,47 @@
 import os
-import csv
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from collections import defaultdict
+from history_util import iter_csv_rows, has_heading, file_has_heading
+
+# Width of the timestamp buckets used to cache formatted play dates (15 minutes)
+_DATE_BUCKET_MS = 900_000
+
+# Section heading written by append_tracks_to_files
+_MUSIC_HISTORY_HEADER = b"## Apple Music Play History"
+
+# Buffer size for writing sections, so each file is written in one system call
+_WRITE_BUFFER_BYTES = 1 << 20
+
+def _iter_plays(music_file_path: str) -> Iterator[Tuple[str, int]]:
+    """
+    Yield (track name, Last Played Date in milliseconds) for every row of the export
+    that has a whole-number timestamp.
+
+    Args:
+        music_file_path (str): Path to the Apple Music CSV export.
+
+    Returns:
+        Iterator[Tuple[str, int]]: Track name and timestamp of each play, in file order.
+    """
+    with contextlib.closing(iter_csv_rows(music_file_path)) as reader:
+        header = next(reader, [])
+        try:
+            track_idx = header.index("Track Name")
+            date_idx = header.index("Last Played Date")
+        except ValueError as e:
+            print(f"Music file is missing a required column: {e}")
+            return
+
+        # Plain rows indexed by position avoid building a dict for every line
+        for row in reader:
+            try:
+                yield row[track_idx], int(row[date_idx])
+            except (ValueError, IndexError):
+                # Skip short rows and rows with invalid timestamps
+                continue
 
 class MusicHistoryProcessor:
     """
@@ -29,33 +68,37 @@ class MusicHistoryProcessor:
             defaultdict: A dictionary where keys are dates (YYYY-MM-DD) and values are lists of unique tracks.
         """
         tracks_by_date = defaultdict(list)
+        # Entries already added per date, so the duplicate check doesn't scan the list
+        seen_by_date = defaultdict(set)
+        # Formatted dates by 15-minute bucket of the timestamp; every UTC offset is a
+        # multiple of 15 minutes, so all plays in a bucket fall on the same local date
+        date_cache = {}
 
         if not os.path.exists(self.music_file_path):
             print(f"Music file not found: {self.music_file_path}")
             return tracks_by_date
 
         try:
-            with open(self.music_file_path, mode="r", encoding="utf-8") as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    # Get track name
-                    track_name = row.get("Track Name", "")
-                    
-                    # Convert Unix timestamp (milliseconds) to datetime
-                    try:
-                        timestamp_ms = int(row.get("Last Played Date", "0"))
+            for track_name, timestamp_ms in _iter_plays(self.music_file_path):
+                # Convert Unix timestamp (milliseconds) to datetime
+                try:
+                    bucket = timestamp_ms // _DATE_BUCKET_MS
+                    formatted_date = date_cache.get(bucket)
+                    if formatted_date is None:
                         date_played = datetime.fromtimestamp(timestamp_ms / 1000)  # Convert ms to seconds
-                        formatted_date = date_played.strftime('%Y-%m-%d')
-                        
-                        # Create a simple bullet point entry
-                        track_entry = f"* {track_name}"
-                        
-                        # Avoid duplicates for the same date
-                        if track_entry not in tracks_by_date[formatted_date]:
-                            tracks_by_date[formatted_date].append(track_entry)
-                    except (ValueError, TypeError):
-                        # Skip rows with invalid timestamps
-                        continue
+                        formatted_date = date_cache[bucket] = date_played.strftime('%Y-%m-%d')
+                except (ValueError, TypeError):
+                    # Skip rows with invalid timestamps
+                    continue
+                
+                # Create a simple bullet point entry
+                track_entry = f"* {track_name}"
+                
+                # Avoid duplicates for the same date
+                seen = seen_by_date[formatted_date]
+                if track_entry not in seen:
+                    seen.add(track_entry)
+                    tracks_by_date[formatted_date].append(track_entry)
         except Exception as e:
             print(f"Error processing music file: {e}")
         
@@ -72,10 +115,7 @@ class MusicHistoryProcessor:
             bool: True if the file already has a music history section, False otherwise.
         """
         try:
-            with open(file_path, mode="r", encoding="utf-8") as file:
-                content = file.read()
-                # Check for the actual heading used in append_tracks_to_files
-                return "## Apple Music Play History" in content
+            return file_has_heading(file_path, _MUSIC_HISTORY_HEADER)
         except Exception as e:
             print(f"Error reading file {file_path}: {e}")
             return False
@@ -101,9 +141,11 @@ class MusicHistoryProcessor:
             print("No music history data found to process.")
             return
 
-        processed_files = 0
-        created_files = 0
-        # Iterate through each date found in the music history
+        # Month directories already created and checked
+        prepared_dirs = set()
+        # (file_date, file_path, tracks) for each file to update
+        work = []
+        # Iterate through each date found in the music history, preparing directories serially
         for file_date, tracks in tracks_by_date.items():
             try:
                 # Extract year and month name from the date string (YYYY-MM-DD)
@@ -117,58 +159,96 @@ class MusicHistoryProcessor:
                 file_name = f"{file_date}.md"
                 file_path = os.path.join(target_subdir, file_name)
 
-                print(f"Processing Music date: {file_date} -> {file_path}")
-
-                # Ensure the target subdirectory exists
-                try:
-                    os.makedirs(target_subdir, exist_ok=True)
-                except OSError as e:
-                    print(f"Error creating directory {target_subdir}: {e}")
-                    continue
-                
-                # Check if subdirectory is writable
-                if not os.access(target_subdir, os.W_OK):
-                    print(f"Error: Directory is not writable: {target_subdir}")
-                    continue
-
-                # Check if the target file exists
-                if os.path.exists(file_path):
-                    print(f"  File already exists: {file_path}")
+                if target_subdir not in prepared_dirs:
+                    # Ensure the target subdirectory exists
+                    try:
+                        os.makedirs(target_subdir, exist_ok=True)
+                    except OSError as e:
+                        print(f"Error creating directory {target_subdir}: {e}")
+                        continue
                     
-                    # Check if file is writable
-                    if not os.access(file_path, os.W_OK):
-                        print(f"  Error: File is not writable: {file_path}")
+                    # Check if subdirectory is writable
+                    if not os.access(target_subdir, os.W_OK):
+                        print(f"Error: Directory is not writable: {target_subdir}")
                         continue
-                        
+                    prepared_dirs.add(target_subdir)
+
+                work.append((file_date, file_path, tracks))
+            except Exception as e:
+                print(f"  Error processing date {file_date}: {e}")
+
+        # Each file is independent and the work is IO bound, so update them on a thread pool.
+        # map() returns results in date order, so each file's messages print together and in order
+        processed_files = 0
+        created_files = 0
+        if work:
+            max_workers = min(32, (os.cpu_count() or 1) * 4, len(work))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for status, messages in executor.map(self._update_music_file, work):
+                    print("\n".join(messages))
+                    if status == "appended":
+                        processed_files += 1
+                    elif status == "created":
+                        created_files += 1
+
+        print(f"Finished processing music history. Appended to {processed_files} existing file(s), created {created_files} new file(s).")
+
+    def _update_music_file(self, item: Tuple[str, str, List[str]]) -> Tuple[Optional[str], List[str]]:
+        """
+        Append the music history section to one file, or create the file with it.
+        Whether the file exists is decided by opening it, with no separate stat.
+        Runs on a worker thread, so messages are returned for the caller to print.
+
+        Args:
+            item (Tuple[str, str, List[str]]): File date, file path and track entries.
+
+        Returns:
+            Tuple[Optional[str], List[str]]: "appended", "created" or None, and the messages to print.
+        """
+        file_date, file_path, tracks = item
+        file_name = os.path.basename(file_path)
+        messages = [f"Processing Music date: {file_date} -> {file_path}"]
+        log = messages.append
+        try:
+            # Track list for the section, joined and encoded once and written with a single call
+            section_body = ("\n".join(tracks) + "\n").encode("utf-8")
+
+            try:
+                file = open(file_path, mode="r+b", buffering=_WRITE_BUFFER_BYTES)
+            except FileNotFoundError:
+                file = None
+            except PermissionError:
+                log(f"  File already exists: {file_path}")
+                log(f"  Error: File is not writable: {file_path}")
+                return None, messages
+
+            if file is not None:
+                log(f"  File already exists: {file_path}")
+                with file:
                     # Check if file already has music history section
-                    if self.file_already_has_music_history(file_path):
-                        print(f"  File already has music history section. Skipping.")
-                        continue
+                    if has_heading(file, _MUSIC_HISTORY_HEADER):
+                        log(f"  File already has music history section. Skipping.")
+                        return None, messages
 
                     # Append music history
                     try:
-                        with open(file_path, mode="a", encoding="utf-8") as file:
-                            file.write("\n## Apple Music Play History\n\n")
-                            file.write("\n".join(tracks))
-                            file.write("\n")
-                        print(f"  Added music history to {file_name}")
-                        processed_files += 1
-                    except Exception as e:
-                        print(f"  Error appending music history to {file_name}: {e}")
-                else:
-                    # File does not exist, create it and add history
-                    print(f"  File does not exist, creating: {file_path}")
-                    try:
-                        with open(file_path, mode="w", encoding="utf-8") as file:
-                            # Add the music history section (Removed Journal Entry header)
-                            file.write("## Apple Music Play History\n\n")
-                            file.write("\n".join(tracks))
-                            file.write("\n")
-                        print(f"  Created file and added music history: {file_name}")
-                        created_files += 1
+                        file.seek(0, os.SEEK_END)
+                        file.write(b"\n" + _MUSIC_HISTORY_HEADER + b"\n\n" + section_body)
+                        log(f"  Added music history to {file_name}")
+                        return "appended", messages
                     except Exception as e:
-                        print(f"  Error creating file {file_name}: {e}")
-            except Exception as e:
-                print(f"  Error processing date {file_date}: {e}")
-
-        print(f"Finished processing music history. Appended to {processed_files} existing file(s), created {created_files} new file(s).")
\ No newline at end of file
+                        log(f"  Error appending music history to {file_name}: {e}")
+            else:
+                # File does not exist, create it and add history
+                log(f"  File does not exist, creating: {file_path}")
+                try:
+                    with open(file_path, mode="wb", buffering=_WRITE_BUFFER_BYTES) as file:
+                        # Add the music history section (Removed Journal Entry header)
+                        file.write(_MUSIC_HISTORY_HEADER + b"\n\n" + section_body)
+                    log(f"  Created file and added music history: {file_name}")
+                    return "created", messages
+                except Exception as e:
+                    log(f"  Error creating file {file_name}: {e}")
+        except Exception as e:
+            log(f"  Error processing date {file_date}: {e}")
+        return None, messages
@@ -1,7 +1,8 @@
-import json
 import time
 import os
 import getpass
+import socket
+import threading
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
@@ -9,11 +10,197 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from file_handler import load_config
 
-def load_config(config_path='config.json'):
-    """Load configuration from JSON file."""
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# watchdog lets the download wait wake on a file event instead of polling; it is optional
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# Chrome profile kept between runs so the Netflix login cookies survive; the browser
+# itself is started and quit on every call
+_PROFILE_DIR = os.path.expanduser("~/.md_inserts/netflix_chrome_profile")
+
+# Disk cache for page assets, so repeat visits load faster; kept in the user's own
+# directory rather than the shared temp directory, where another user could claim it
+_CACHE_DIR = os.path.expanduser("~/.md_inserts/netflix_cache")
+
+def _chrome_options(download_dir):
+    """
+    Build the headless Chrome options used for Netflix downloads.
+
+    Args:
+        download_dir (str): Directory Chrome saves downloads to.
+
+    Returns:
+        Options: Configured Chrome options.
+    """
+    # Set up Chrome options for headless mode
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new") # Re-enabled headless mode
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument(f"--user-data-dir={_PROFILE_DIR}")
+    # Only the DOM is needed to find and click the download link, so skip images
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument(f"--disk-cache-dir={_CACHE_DIR}")
+    print("DEBUG: Chrome options configured for headless mode.") # Updated log message
+
+    # Configure download behavior for headless mode
+    prefs = {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True,
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    }
+    chrome_options.add_experimental_option("prefs", prefs)
+    print("DEBUG: Chrome download preferences configured.") # Added
+    return chrome_options
+
+def _clear_stale_profile_lock():
+    """
+    Remove the Chrome profile lock left behind by a run that was killed.
+    Chrome records "<hostname>-<pid>" in the SingletonLock symlink; when that process
+    is gone on this host, the lock files would otherwise stop every later run from
+    starting Chrome with this profile.
+    """
+    lock_path = os.path.join(_PROFILE_DIR, "SingletonLock")
+    try:
+        owner = os.readlink(lock_path)
+    except OSError:
+        return  # No lock, or not a symlink lock we can inspect
+    host, _, pid = owner.rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        return  # Held by another machine sharing the profile, or unknown format
+    try:
+        os.kill(int(pid), 0)
+        return  # The owning Chrome is still running
+    except ProcessLookupError:
+        pass
+    except OSError:
+        return  # Exists but belongs to another user, or can't be checked
+    print(f"DEBUG: Removing stale Chrome profile lock left by process {pid}.")
+    for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
+        try:
+            os.remove(os.path.join(_PROFILE_DIR, name))
+        except FileNotFoundError:
+            pass
+
+def _is_history_file(name):
+    """
+    Check whether a file name is a Netflix viewing history export.
+
+    Args:
+        name (str): File name without directory.
+
+    Returns:
+        bool: True for NetflixViewingHistory*.csv names.
+    """
+    return name.startswith("NetflixViewingHistory") and name.endswith(".csv")
+
+def _newest_history_file(download_dir):
+    """
+    Find the most recently modified, fully downloaded Netflix viewing history export
+    in a directory.
+
+    Args:
+        download_dir (str): Directory to search.
+
+    Returns:
+        Optional[str]: Path of the newest export, or None if there is none or a
+            download is still in progress.
+    """
+    found_files = []
+    # scandir entries carry their path, so no per-file join; only matching entries are
+    # statted, one stat each as with getmtime
+    with os.scandir(download_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".crdownload"):
+                # Chrome is still writing a download; the export may not be complete yet
+                return None
+            if _is_history_file(entry.name):
+                st = entry.stat()
+                # An empty file has been created but not written yet
+                if st.st_size > 0:
+                    found_files.append((st.st_mtime, entry.path))
+    if not found_files:
+        return None
+    # Newest first to handle multiple downloads
+    return max(found_files, key=lambda found: found[0])[1]
+
+class _HistoryFileHandler(FileSystemEventHandler):
+    """
+    Watchdog handler that reports files renamed into the watched directory.
+    """
+
+    def __init__(self, on_file):
+        super().__init__()
+        self._on_file = on_file
+
+    def on_moved(self, event):
+        # Chrome downloads to a .crdownload file and renames it when complete, so the
+        # rename (not the creation, which can precede any data) marks a finished export
+        if not event.is_directory:
+            self._on_file(event.dest_path)
+
+class _DownloadWatcher:
+    """
+    Signals as soon as a finished Netflix viewing history export appears in a directory.
+    """
+
+    def __init__(self, download_dir):
+        self.path = None
+        self._found = threading.Event()
+        self._observer = Observer()
+        self._observer.schedule(_HistoryFileHandler(self._on_file), download_dir, recursive=False)
+        self._observer.start()
+
+    def _on_file(self, path):
+        if _is_history_file(os.path.basename(path)):
+            self.path = path
+            self._found.set()
+
+    def wait(self, timeout):
+        """
+        Block until an export appears or the timeout passes.
+
+        Args:
+            timeout (float): Seconds to wait.
+
+        Returns:
+            Optional[str]: Path of the export, or None on timeout.
+        """
+        return self.path if self._found.wait(timeout) else None
+
+    def stop(self):
+        """Stop and join the observer thread."""
+        self._observer.stop()
+        self._observer.join()
+
+def _start_download_watch(download_dir):
+    """
+    Start watching the download directory if watchdog is installed.
+
+    Args:
+        download_dir (str): Directory Chrome saves downloads to.
+
+    Returns:
+        Optional[_DownloadWatcher]: Running watcher, or None to fall back to polling.
+    """
+    if Observer is None or not os.path.isdir(download_dir):
+        return None
+    try:
+        return _DownloadWatcher(download_dir)
+    except Exception as e:
+        print(f"WARNING: Could not watch {download_dir}, polling instead: {e}")
+        return None
 
 def download_netflix_history(config, password):
     """
@@ -46,25 +233,6 @@ def download_netflix_history(config, password):
         print(f"WARNING: Download directory does not exist: {download_dir}")
         # Attempt to create it? Or just warn? For now, just warn.
 
-    # Set up Chrome options for headless mode
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new") # Re-enabled headless mode
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    print("DEBUG: Chrome options configured for headless mode.") # Updated log message
-
-    # Configure download behavior for headless mode
-    prefs = {
-        "download.default_directory": download_dir,
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True
-    }
-    chrome_options.add_experimental_option("prefs", prefs)
-    print("DEBUG: Chrome download preferences configured.") # Added
-
     # Initialize the driver
     driver = None # Initialize driver to None
     download_successful = False # Initialize success flag
@@ -73,7 +241,8 @@ def download_netflix_history(config, password):
         # Consider using webdriver-manager if chromedriver isn't in PATH
         # from webdriver_manager.chrome import ChromeDriverManager
         # driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        driver = webdriver.Chrome(options=chrome_options)
+        _clear_stale_profile_lock()
+        driver = webdriver.Chrome(options=_chrome_options(download_dir))
         print("DEBUG: WebDriver initialized successfully.")
 
         # Navigate to Netflix history URL
@@ -130,47 +299,60 @@ def download_netflix_history(config, password):
         )
         print("DEBUG: 'Download all' link confirmed present.")
 
-        # Click the "Download all" link
-        print("DEBUG: Finding 'Download all' link...")
-        download_link = driver.find_element(By.LINK_TEXT, "Download all")
-        print("DEBUG: Clicking 'Download all' link...")
-        download_link.click()
-        print("DEBUG: 'Download all' link clicked.")
-
-        # Wait for download to start and complete
-        print(f"DEBUG: Starting wait loop for download completion in {download_dir} (max 90s)...")
-        max_wait_time = 90  # Increased wait time
-        start_time = time.time()
-        file_found = False
-        downloaded_file_path = None
-
-        while time.time() - start_time < max_wait_time:
-            try:
-                # Check for file existence
-                found_files = [f for f in os.listdir(download_dir) if f.startswith("NetflixViewingHistory") and f.endswith(".csv")]
-                if found_files:
-                    # Sort by modification time (newest first) to handle multiple downloads
-                    found_files.sort(key=lambda f: os.path.getmtime(os.path.join(download_dir, f)), reverse=True)
-                    downloaded_file_path = os.path.join(download_dir, found_files[0])
-                    print(f"DEBUG: File found in loop: {downloaded_file_path}")
+        # Watch the download directory before clicking so the new file can't be missed
+        watcher = _start_download_watch(download_dir)
+        try:
+            # Click the "Download all" link
+            print("DEBUG: Finding 'Download all' link...")
+            download_link = driver.find_element(By.LINK_TEXT, "Download all")
+            print("DEBUG: Clicking 'Download all' link...")
+            download_link.click()
+            print("DEBUG: 'Download all' link clicked.")
+
+            # Wait for download to start and complete
+            print(f"DEBUG: Starting wait loop for download completion in {download_dir} (max 90s)...")
+            max_wait_time = 90  # Increased wait time
+            start_time = time.time()
+            file_found = False
+            downloaded_file_path = None
+
+            if watcher is not None:
+                # Event driven: wake as soon as the file lands, with one sweep on timeout
+                # in case it arrived before the observer was running
+                downloaded_file_path = watcher.wait(max_wait_time) or _newest_history_file(download_dir)
+                if downloaded_file_path:
+                    print(f"DEBUG: File found by watcher: {downloaded_file_path}")
                     file_found = True
                     download_successful = True # Set success flag
-                    break # Exit loop once file is found
-                else:
-                    # Print status periodically
-                    if int(time.time() - start_time) % 10 == 0: # Print every 10 seconds
-                         print(f"INFO: Still waiting for download... ({int(time.time() - start_time)}s elapsed)")
-
-            except FileNotFoundError:
-                 print(f"ERROR: Download directory {download_dir} seems to have disappeared during check.")
-                 break # Stop checking if directory is gone
-            except Exception as list_err:
-                 print(f"ERROR: Could not list download directory contents: {list_err}")
-                 # Decide whether to break or continue trying
-                 break
-
-            if not file_found:
-                time.sleep(2)  # Wait 2 seconds before checking again
+
+            # Without watchdog, poll the directory
+            while watcher is None and time.time() - start_time < max_wait_time:
+                try:
+                    # Check for file existence
+                    downloaded_file_path = _newest_history_file(download_dir)
+                    if downloaded_file_path:
+                        print(f"DEBUG: File found in loop: {downloaded_file_path}")
+                        file_found = True
+                        download_successful = True # Set success flag
+                        break # Exit loop once file is found
+                    else:
+                        # Print status periodically
+                        if int(time.time() - start_time) % 10 == 0: # Print every 10 seconds
+                             print(f"INFO: Still waiting for download... ({int(time.time() - start_time)}s elapsed)")
+
+                except FileNotFoundError:
+                     print(f"ERROR: Download directory {download_dir} seems to have disappeared during check.")
+                     break # Stop checking if directory is gone
+                except Exception as list_err:
+                     print(f"ERROR: Could not list download directory contents: {list_err}")
+                     # Decide whether to break or continue trying
+                     break
+
+                if not file_found:
+                    time.sleep(2)  # Wait 2 seconds before checking again
+        finally:
+            if watcher is not None:
+                watcher.stop()
 
         if file_found:
             print("DEBUG: Download loop finished. File was found.")
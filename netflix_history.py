@@ -1,9 +1,78 @@
 import os
-import csv
-import glob
-from datetime import datetime
-from typing import Dict, List, Optional
+import contextlib
+import functools
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
 from collections import defaultdict
+from history_util import iter_csv_rows, file_has_heading
+
+# Section heading written by append_shows_to_files
+_NETFLIX_HISTORY_HEADER = b"## Netflix Viewing History"
+
+def _iter_viewings(netflix_file_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (Title, Date) for every row of a Netflix viewing history CSV. Nothing is
+    yielded if either column is missing.
+
+    Args:
+        netflix_file_path (str): Path to the Netflix viewing history CSV.
+
+    Returns:
+        Iterator[Tuple[str, str]]: Title and date viewed of each row, in file order.
+    """
+    with contextlib.closing(iter_csv_rows(netflix_file_path)) as reader:
+        header = next(reader, [])
+        if "Title" not in header or "Date" not in header:
+            return
+        title_idx = header.index("Title")
+        date_idx = header.index("Date")
+        # Plain rows indexed by position avoid building a dict for every line
+        for row in reader:
+            try:
+                yield row[title_idx], row[date_idx]
+            except IndexError:
+                # Short rows are missing data
+                continue
+
+def _is_ascii_number(text: str, min_len: int, max_len: int) -> bool:
+    """
+    Check that text is an ASCII digit string of the given length range.
+
+    Args:
+        text (str): Text to check.
+        min_len (int): Minimum number of digits.
+        max_len (int): Maximum number of digits.
+
+    Returns:
+        bool: True if text is min_len to max_len ASCII digits.
+    """
+    return min_len <= len(text) <= max_len and text.isascii() and text.isdigit()
+
+@functools.lru_cache(maxsize=4096)
+def _format_viewed_date(date_viewed: str) -> Optional[str]:
+    """
+    Convert a Netflix MM/DD/YY date to YYYY-MM-DD. Cached, since a viewing history
+    repeats the same dates many times. Plain M/D/YY values are split directly; anything
+    else goes through strptime so the accepted formats are unchanged.
+
+    Args:
+        date_viewed (str): Date from the Netflix CSV.
+
+    Returns:
+        Optional[str]: The date as YYYY-MM-DD, or None if it can't be parsed.
+    """
+    parts = date_viewed.split("/")
+    try:
+        if (len(parts) == 3 and _is_ascii_number(parts[0], 1, 2)
+                and _is_ascii_number(parts[1], 1, 2) and _is_ascii_number(parts[2], 2, 2)):
+            month, day, year = int(parts[0]), int(parts[1]), int(parts[2])
+            # Same two-digit year pivot as %y: 69-99 are 1900s, 00-68 are 2000s
+            year += 1900 if year >= 69 else 2000
+            date(year, month, day)  # Raises ValueError for impossible dates
+            return f"{year:04d}-{month:02d}-{day:02d}"
+        return datetime.strptime(date_viewed, "%m/%d/%y").strftime('%Y-%m-%d')
+    except (ValueError, TypeError):
+        return None
 
 class NetflixHistoryProcessor:
     """
@@ -39,14 +108,19 @@ class NetflixHistoryProcessor:
             print(f"Netflix history directory not found: {directory}")
             return file_path
             
-        # Look for any file that starts with NetflixViewingHistory and ends with .csv
-        netflix_files = glob.glob(os.path.join(directory, "NetflixViewingHistory*.csv"))
+        # Look for any file that starts with NetflixViewingHistory and ends with .csv;
+        # only matching entries are statted (one stat each, as with getmtime)
+        with os.scandir(directory) as entries:
+            netflix_files = [
+                (entry.stat().st_mtime, entry.path) for entry in entries
+                if entry.name.startswith("NetflixViewingHistory") and entry.name.endswith(".csv")
+            ]
         
         if netflix_files:
-            # Sort by modification time (newest first)
-            netflix_files.sort(key=os.path.getmtime, reverse=True)
-            print(f"Found Netflix history file: {netflix_files[0]}")
-            return netflix_files[0]
+            # Newest first
+            newest = max(netflix_files, key=lambda found: found[0])[1]
+            print(f"Found Netflix history file: {newest}")
+            return newest
         else:
             print(f"No Netflix history files found in: {directory}")
             return file_path
@@ -59,37 +133,33 @@ class NetflixHistoryProcessor:
             defaultdict: A dictionary where keys are dates (YYYY-MM-DD) and values are lists of unique shows.
         """
         shows_by_date = defaultdict(list)
+        # Entries already added per date, so the duplicate check doesn't scan the list
+        seen_by_date = defaultdict(set)
 
         if not os.path.exists(self.netflix_file_path):
             print(f"Netflix history file not found: {self.netflix_file_path}")
             return shows_by_date
 
         try:
-            with open(self.netflix_file_path, mode="r", encoding="utf-8") as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    # Get title and date viewed
-                    title = row.get("Title", "")
-                    date_viewed = row.get("Date", "")
-                    
-                    # Skip if missing data
-                    if not title or not date_viewed:
-                        continue
-                    
-                    # Convert MM/DD/YY date format to YYYY-MM-DD
-                    try:
-                        date_obj = datetime.strptime(date_viewed, "%m/%d/%y")
-                        formatted_date = date_obj.strftime('%Y-%m-%d')
-                        
-                        # Create a simple bullet point entry
-                        show_entry = f"* {title}"
-                        
-                        # Avoid duplicates for the same date
-                        if show_entry not in shows_by_date[formatted_date]:
-                            shows_by_date[formatted_date].append(show_entry)
-                    except (ValueError, TypeError):
-                        print(f"Could not parse date: {date_viewed} for title: {title}")
-                        continue
+            for title, date_viewed in _iter_viewings(self.netflix_file_path):
+                # Skip if missing data
+                if not title or not date_viewed:
+                    continue
+                
+                # Convert MM/DD/YY date format to YYYY-MM-DD
+                formatted_date = _format_viewed_date(date_viewed)
+                if formatted_date is None:
+                    print(f"Could not parse date: {date_viewed} for title: {title}")
+                    continue
+                
+                # Create a simple bullet point entry
+                show_entry = f"* {title}"
+                
+                # Avoid duplicates for the same date
+                seen = seen_by_date[formatted_date]
+                if show_entry not in seen:
+                    seen.add(show_entry)
+                    shows_by_date[formatted_date].append(show_entry)
             
             # Debug: Show found dates
             print(f"Found Netflix history for {len(shows_by_date)} dates")
@@ -114,12 +184,9 @@ class NetflixHistoryProcessor:
         try:
             if not os.path.exists(file_path):
                 return False
-                
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Check if the file already contains Netflix history section
-            return "## Netflix Viewing History" in content
+
+            # Search the raw bytes for the heading written by append_shows_to_files
+            return file_has_heading(file_path, _NETFLIX_HISTORY_HEADER)
         except Exception as e:
             print(f"Error checking file for Netflix history: {e}")
             return False
@@ -173,6 +240,9 @@ class NetflixHistoryProcessor:
 
         processed_files = 0
         created_files = 0
+        # Names of the files in each month directory, listed once per directory so
+        # dates need neither makedirs, an access check nor an exists() stat each
+        files_by_dir = {}
         # Iterate through each date found in the Netflix history
         for file_date, shows in shows_by_date.items():
             try:
@@ -189,20 +259,27 @@ class NetflixHistoryProcessor:
 
                 print(f"Processing Netflix date: {file_date} -> {file_path}")
 
-                # Ensure the target subdirectory exists
-                try:
-                    os.makedirs(target_subdir, exist_ok=True)
-                except OSError as e:
-                    print(f"Error creating directory {target_subdir}: {e}")
-                    continue
+                existing_files = files_by_dir.get(target_subdir)
+                if existing_files is None:
+                    # Ensure the target subdirectory exists
+                    try:
+                        os.makedirs(target_subdir, exist_ok=True)
+                    except OSError as e:
+                        print(f"Error creating directory {target_subdir}: {e}")
+                        continue
+                        
+                    # Check if subdirectory is writable
+                    if not os.access(target_subdir, os.W_OK):
+                        print(f"Error: Directory is not writable: {target_subdir}")
+                        continue
                     
-                # Check if subdirectory is writable
-                if not os.access(target_subdir, os.W_OK):
-                    print(f"Error: Directory is not writable: {target_subdir}")
-                    continue
+                    with os.scandir(target_subdir) as entries:
+                        existing_files = files_by_dir[target_subdir] = {
+                            entry.name for entry in entries if entry.is_file()
+                        }
 
                 # Check if the target file exists
-                if os.path.exists(file_path):
+                if file_name in existing_files:
                     print(f"  File exists: {file_path}")
                     
                     # Check if file is writable